@@ -73,6 +73,11 @@ def main():
         action="store_true",
         help="强制重建每日数据文件，确保使用最新的原始数据计算指数",
     )
+    parser.add_argument(
+        "--parquet-cache",
+        action="store_true",
+        help="使用 Parquet 缓存加载每日数据，加快长时间范围的计算 (需要 pyarrow)",
+    )
 
     args = parser.parse_args()
 
@@ -108,6 +113,7 @@ def main():
             exclude_stablecoins=not args.include_stablecoins,
             exclude_wrapped_coins=not args.include_wrapped_coins,
             force_rebuild=args.force_rebuild,
+            use_parquet_cache=args.parquet_cache,
         )
 
         # 计算指数
@@ -15,6 +15,7 @@ Crypto30 综合分析脚本
 """
 
 import argparse
+import json
 import logging
 import os
 import sys
@@ -23,6 +24,7 @@ from datetime import date, datetime, timedelta
 from pathlib import Path
 from typing import Dict, List, Tuple, Optional
 
+import numpy as np
 import pandas as pd
 from tqdm import tqdm
 
@@ -70,23 +72,19 @@ class Crypto30ComprehensiveAnalyzer:
         Returns:
             (成分币种列表, 权重字典, 价格字典)
         """
-        # 获取市值数据
-        market_caps = self.calculator._get_daily_market_caps(target_date)
-        if not market_caps:
+        # 选择前N名并计算权重（计算器内按日期缓存）
+        constituents, weight_values, _ = self.calculator._get_top_coins_cached(
+            target_date, top_n
+        )
+        if not constituents:
             return [], {}, {}
 
-        # 选择前N名
-        constituents = self.calculator._select_top_coins(market_caps, top_n)
-
-        # 计算权重
-        weights = self.calculator._calculate_weights(constituents, market_caps)
+        constituents = list(constituents)
+        weights = dict(zip(constituents, weight_values.tolist()))
 
-        # 获取价格
-        prices = {}
-        for coin_id in constituents:
-            price = self.calculator._get_coin_price(coin_id, target_date)
-            if price is not None:
-                prices[coin_id] = price
+        # 批量获取价格，跳过缺失价格的币种
+        price_series = self.calculator._get_prices_batch(constituents, target_date)
+        prices = price_series.dropna().to_dict()
 
         return constituents, weights, prices
 
@@ -115,49 +113,47 @@ class Crypto30ComprehensiveAnalyzer:
             top_n=30,
         )
 
-        detailed_data = []
+        # 预分配输出数组，逐日填充，最后一次性构建DataFrame
+        dates = index_df["date"].to_numpy()
+        constituent_counts = np.zeros(len(dates), dtype=np.int64)
+        weights_json = np.empty(len(dates), dtype=object)
+        has_constituents = np.zeros(len(dates), dtype=bool)
 
         # 为每个日期生成详细数据
-        with tqdm(total=len(index_df), desc="生成详细数据", unit="天") as pbar:
-            for _, row in index_df.iterrows():
-                current_date = row["date"]
-                index_value = row["index_value"]
-
-                # 获取当日成分和权重
-                constituents, weights, prices = self.get_daily_constituents_and_weights(
-                    current_date, 30
-                )
-
-                if not constituents:
-                    pbar.update(1)
-                    continue
-
-                # 构建成分权重信息 - 只保留核心数据
-                import json
-
-                constituent_weights_dict = {}
-                for coin_id in constituents:
-                    weight_decimal = weights.get(coin_id, 0)
-                    constituent_weights_dict[coin_id] = round(
-                        weight_decimal, 5
-                    )  # 保留5位小数
-
-                constituent_weights_json = json.dumps(
-                    constituent_weights_dict, ensure_ascii=False
-                )
-
-                detailed_data.append(
-                    {
-                        "date": current_date,
-                        "index_value": index_value,
-                        "constituent_count": len(constituents),
-                        "constituent_weights_json": constituent_weights_json,  # 只保留JSON格式的精确权重
-                    }
-                )
-
-                pbar.update(1)
+        for i, current_date in enumerate(tqdm(dates, desc="生成详细数据", unit="天")):
+            # 获取当日成分和权重
+            constituents, weights, prices = self.get_daily_constituents_and_weights(
+                current_date, 30
+            )
 
-        return pd.DataFrame(detailed_data)
+            if not constituents:
+                continue
+
+            # 构建成分权重信息 - 只保留核心数据（整列一次舍入，保留5位小数）
+            rounded_weights = np.round(
+                np.fromiter(
+                    (weights.get(coin_id, 0) for coin_id in constituents),
+                    dtype=np.float64,
+                    count=len(constituents),
+                ),
+                5,
+            )
+            constituent_weights_dict = dict(zip(constituents, rounded_weights.tolist()))
+
+            constituent_counts[i] = len(constituents)
+            # 只保留JSON格式的精确权重
+            weights_json[i] = json.dumps(constituent_weights_dict, ensure_ascii=False)
+            has_constituents[i] = True
+
+        detailed_df = pd.DataFrame(
+            {
+                "date": dates,
+                "index_value": index_df["index_value"].to_numpy(),
+                "constituent_count": constituent_counts,
+                "constituent_weights_json": weights_json,
+            }
+        )
+        return detailed_df[has_constituents].reset_index(drop=True)
 
     def analyze_monthly_changes(self, detailed_df: pd.DataFrame) -> List[Dict]:
         """
@@ -186,8 +182,6 @@ class Crypto30ComprehensiveAnalyzer:
             month_end = group.iloc[-1]
 
             # 解析月末成分 - 从JSON权重数据中获取
-            import json
-
             current_constituents = set()
             if month_end["constituent_weights_json"]:
                 try:
@@ -126,6 +126,11 @@ def main():
         help="启用文件备份功能 (默认: 禁用，避免产生大量备份文件)",
     )
     parser.add_argument("--no-backup", action="store_true", help="禁用文件备份功能")
+    parser.add_argument(
+        "--full-resort",
+        action="store_true",
+        help="集成后对所有每日文件重新排序做一致性检查 (默认: 跳过，写入时已排序)",
+    )
     parser.add_argument(
         "--coins-dir",
         type=str,
@@ -138,6 +143,12 @@ def main():
         default="data/daily/daily_files",
         help="每日汇总数据目录 (默认: data/daily/daily_files)",
     )
+    parser.add_argument(
+        "--market-cache-ttl",
+        type=float,
+        default=0,
+        help="市值排名缓存有效期，单位秒 (默认: 0，不缓存)",
+    )
     parser.add_argument("--verbose", "-v", action="store_true", help="启用详细日志输出")
 
     args = parser.parse_args()
@@ -167,11 +178,15 @@ def main():
             coins_dir=args.coins_dir,
             daily_dir=args.daily_dir,
             backup_enabled=backup_enabled,
+            market_cache_ttl=args.market_cache_ttl,
         )
 
         # 执行增量更新
         results = updater.update_with_new_coins(
-            top_n=args.top_n, max_workers=args.max_workers, dry_run=args.dry_run
+            top_n=args.top_n,
+            max_workers=args.max_workers,
+            dry_run=args.dry_run,
+            full_resort=args.full_resort,
         )
 
         # 显示结果
@@ -48,7 +48,11 @@ class UpdateLogger:
 
     def __init__(self, log_path: Path):
         self.log_path = log_path
-        self.log_df = self._load_or_create_log()
+        log_df = self._load_or_create_log()
+        # 币种ID -> 最后更新日期字符串，查询和更新都是 O(1)，避免每个币种扫描整个表
+        self.last_updated: Dict[str, str] = {}
+        for coin_id, last_updated in zip(log_df["coin_id"], log_df["last_updated"]):
+            self.last_updated.setdefault(coin_id, last_updated)
 
     def _load_or_create_log(self) -> pd.DataFrame:
         """加载或创建更新日志"""
@@ -64,12 +68,10 @@ class UpdateLogger:
 
     def get_last_update_date(self, coin_id: str) -> Optional[date]:
         """获取币种的最后更新日期"""
-        record = self.log_df[self.log_df["coin_id"] == coin_id]
-        if not record.empty:
+        last_updated = self.last_updated.get(coin_id)
+        if last_updated is not None:
             try:
-                return datetime.strptime(
-                    record.iloc[0]["last_updated"], "%Y-%m-%d"
-                ).date()
+                return datetime.strptime(last_updated, "%Y-%m-%d").date()
             except (ValueError, TypeError):
                 return None
         return None
@@ -77,17 +79,16 @@ class UpdateLogger:
     def log_update(self, coin_id: str):
         """记录币种的更新时间"""
         today_str = date.today().strftime("%Y-%m-%d")
-        if coin_id in self.log_df["coin_id"].values:
-            self.log_df.loc[self.log_df["coin_id"] == coin_id, "last_updated"] = (
-                today_str
-            )
-        else:
-            new_record = pd.DataFrame([{"coin_id": coin_id, "last_updated": today_str}])
-            self.log_df = pd.concat([self.log_df, new_record], ignore_index=True)
+        self.last_updated[coin_id] = today_str
 
     def save_log(self):
         """保存更新日志"""
-        self.log_df.to_csv(self.log_path, index=False)
+        pd.DataFrame(
+            {
+                "coin_id": list(self.last_updated.keys()),
+                "last_updated": list(self.last_updated.values()),
+            }
+        ).to_csv(self.log_path, index=False)
         logger.info(f"更新日志已保存到 {self.log_path}")
 
 
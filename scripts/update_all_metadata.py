@@ -9,6 +9,7 @@
     python scripts/update_all_metadata.py          # 标准模式
     python scripts/update_all_metadata.py --fast   # 快速模式
     python scripts/update_all_metadata.py --force  # 强制更新所有
+    python scripts/update_all_metadata.py --workers 4  # 指定并发线程数
 """
 
 import argparse
@@ -37,6 +38,15 @@ def main():
     parser.add_argument(
         "--fast", action="store_true", help="快速模式（减少延迟时间）"
     )
+    parser.add_argument(
+        "--workers", type=int, default=8, help="并发请求的线程数（默认: 8，1 为串行）"
+    )
+    parser.add_argument(
+        "--rpm", type=float, default=None, help="每分钟最大请求数（默认按延迟时间推算）"
+    )
+    parser.add_argument(
+        "--adaptive", action="store_true", help="按批次成功率自适应调整批次大小和请求速率"
+    )
 
     args = parser.parse_args()
 
@@ -57,7 +67,7 @@ def main():
 
     try:
         # 创建更新器
-        updater = MetadataUpdater()
+        updater = MetadataUpdater(requests_per_minute=args.rpm)
 
         # 1. 批量更新元数据
         print("\n🚀 开始批量更新元数据...")
@@ -65,6 +75,8 @@ def main():
             batch_size=batch_size,
             delay_seconds=delay_seconds,
             force_update=args.force,
+            max_workers=args.workers,
+            adaptive=args.adaptive,
         )
 
         # 2. 更新所有分类列表
@@ -103,6 +115,7 @@ if __name__ == "__main__":
     print("  python scripts/update_all_metadata.py          # 标准模式")
     print("  python scripts/update_all_metadata.py --fast   # 快速模式")
     print("  python scripts/update_all_metadata.py --force  # 强制更新所有")
+    print("  python scripts/update_all_metadata.py --workers 4  # 指定并发线程数")
     print("")
 
     main()
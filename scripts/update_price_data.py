@@ -42,6 +42,12 @@ def main():
     parser.add_argument(
         "--max-range", type=int, default=1000, help="最大搜索范围 (默认: 1000)"
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=16,
+        help="并发下载线程数 (默认: 16，1 为逐个下载)",
+    )
     # 新增每日数据汇总选项
     parser.add_argument(
         "--update-daily",
@@ -73,6 +79,7 @@ def main():
     print(f"📊 配置信息:")
     print(f"   - 目标原生币种数: {args.native_coins}")
     print(f"   - 最大搜索范围: {args.max_range}")
+    print(f"   - 并发下载数: {args.workers}")
     print(f"   - 更新每日汇总: {'是' if args.update_daily else '否'}")
     print(f"   - 增量每日更新: {'是' if args.incremental_daily else '否'}")
     print(f"   - 试运行模式: {'是' if args.dry_run else '否'}")
@@ -83,7 +90,9 @@ def main():
     try:
         # 创建更新器并执行更新
         updater = PriceDataUpdater()
-        updater.update_with_smart_strategy(args.native_coins, args.max_range)
+        updater.update_with_smart_strategy(
+            args.native_coins, args.max_range, max_workers=args.workers
+        )
 
         # 可选的每日数据汇总
         if args.update_daily or args.incremental_daily:
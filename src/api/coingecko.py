@@ -8,6 +8,7 @@ import os
 from typing import Any, Dict, List, Optional
 
 import requests
+from requests.adapters import HTTPAdapter
 from dotenv import load_dotenv
 
 # 加载环境变量
@@ -36,6 +37,20 @@ class CoinGeckoAPI:
             print("警告: 未找到 API Key，将使用免费接口（有限制）")
             self.base_url = "https://api.coingecko.com/api/v3"
 
+    def set_pool_size(self, pool_size: int) -> None:
+        """
+        调整会话的连接池大小
+
+        requests 默认每个主机只保留 10 个连接，多线程共享同一会话时
+        超出的连接会被丢弃并反复重建，因此并发数应不超过连接池大小。
+
+        Args:
+            pool_size: 每个主机保留的最大连接数
+        """
+        adapter = HTTPAdapter(pool_maxsize=max(1, pool_size))
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
     def _make_request(self, endpoint: str, params: Optional[Dict] = None) -> Any:
         """
         发送 API 请求的通用方法
@@ -5,18 +5,21 @@
 减少重复的元数据加载，提高性能。
 """
 
+import hashlib
+import json
+import logging
 import os
-import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Set
-from dataclasses import dataclass
+from dataclasses import asdict, dataclass
 
-# 添加项目根目录到Python路径
-sys.path.insert(
-    0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-)
+import pandas as pd
+from tqdm import tqdm
 
-from src.downloaders.batch_downloader import create_batch_downloader
+from ..downloaders.batch_downloader import BatchDownloader, create_batch_downloader
+
+logger = logging.getLogger(__name__)
 
 
 @dataclass
@@ -61,16 +64,127 @@ class UnifiedClassifier:
         "Crypto-Backed Tokens",
     }
 
-    def __init__(self, data_dir: str = "data"):
+    # 分类逻辑版本：修改 classify_coin 的判定逻辑或 ClassificationResult 字段时递增，
+    # 使跨运行的分类结果清单和元数据摘要失效
+    RULES_VERSION = 1
+
+    def __init__(
+        self, data_dir: str = "data", downloader: Optional[BatchDownloader] = None
+    ):
         """初始化分类器
 
         Args:
             data_dir: 数据目录路径
+            downloader: 复用的批量下载器实例，None 表示新建
         """
         self.metadata_dir = Path(data_dir) / "metadata" / "coin_metadata"
-        self.downloader = create_batch_downloader(data_dir=data_dir)
+        if downloader is None:
+            downloader = create_batch_downloader(data_dir=data_dir)
+        self.downloader = downloader
         self._cache: Dict[str, ClassificationResult] = {}
 
+        # 跨运行的分类结果清单，调用 load_manifest() 后启用
+        self.manifest_path = self.metadata_dir.parent / ".classification_cache.json"
+        self._manifest: Optional[Dict[str, Dict[str, Any]]] = None
+        self._manifest_dirty = False
+
+    def _metadata_signature(self, coin_id: str) -> Optional[List[int]]:
+        """获取元数据文件的签名 [mtime_ns, size]，文件不存在时返回None"""
+        try:
+            stat = os.stat(self.metadata_dir / f"{coin_id}.json")
+        except OSError:
+            return None
+        return [stat.st_mtime_ns, stat.st_size]
+
+    @classmethod
+    def rules_hash(cls) -> str:
+        """计算分类规则（关键词集合和逻辑版本）的摘要
+
+        规则变化后，基于文件签名缓存的分类结果不再可信。
+
+        Returns:
+            十六进制摘要字符串
+        """
+        digest = hashlib.blake2b(digest_size=16, usedforsecurity=False)
+        digest.update(f"v{cls.RULES_VERSION}\n".encode("utf-8"))
+        for keywords in (cls.STABLECOIN_KEYWORDS, cls.WRAPPED_COIN_KEYWORDS):
+            digest.update(";".join(sorted(keywords)).encode("utf-8") + b"\n")
+        return digest.hexdigest()
+
+    def metadata_digest(self, coin_ids: List[str]) -> str:
+        """计算币种列表、元数据文件签名和分类规则的摘要
+
+        摘要不变说明分类结果不会变化，可用于跳过重复的列表生成。
+
+        Args:
+            coin_ids: 币种ID列表
+
+        Returns:
+            十六进制摘要字符串
+        """
+        digest = hashlib.blake2b(digest_size=16, usedforsecurity=False)
+        digest.update(self.rules_hash().encode("utf-8") + b"\n")
+        for coin_id in sorted(coin_ids):
+            signature = self._metadata_signature(coin_id)
+            digest.update(f"{coin_id}:{signature}\n".encode("utf-8"))
+        return digest.hexdigest()
+
+    def load_manifest(self) -> int:
+        """加载分类结果清单，启用基于文件修改时间的跨运行缓存
+
+        启用后，元数据文件未变化的币种直接复用清单中的分类结果，
+        不再读取和解析元数据 JSON。清单记录了生成时的分类规则摘要，
+        规则变化后整个清单作废，所有币种重新分类。
+
+        Returns:
+            清单中的条目数
+        """
+        entries: Dict[str, Dict[str, Any]] = {}
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+            if (
+                not isinstance(manifest, dict)
+                or manifest.get("rules") != self.rules_hash()
+            ):
+                logger.debug("分类规则已变化，分类结果清单作废，将重新分类")
+            elif isinstance(manifest.get("entries"), dict):
+                entries = manifest["entries"]
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            logger.warning(f"分类结果清单读取失败，将重新分类: {e}")
+
+        self._manifest = entries
+        self._manifest_dirty = False
+        return len(self._manifest)
+
+    def save_manifest(self) -> bool:
+        """将分类结果清单原子写入磁盘（先写临时文件再替换）
+
+        Returns:
+            是否成功（清单未启用或无变化时直接返回True）
+        """
+        if self._manifest is None or not self._manifest_dirty:
+            return True
+
+        tmp_path = self.manifest_path.with_name(self.manifest_path.name + ".tmp")
+        try:
+            self.manifest_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(
+                    {"rules": self.rules_hash(), "entries": self._manifest},
+                    f,
+                    ensure_ascii=False,
+                )
+            os.replace(tmp_path, self.manifest_path)
+            self._manifest_dirty = False
+            return True
+        except OSError as e:
+            logger.warning(f"分类结果清单保存失败: {e}")
+            tmp_path.unlink(missing_ok=True)
+            return False
+
     def classify_coin(
         self, coin_id: str, use_cache: bool = True
     ) -> ClassificationResult:
@@ -87,18 +201,31 @@ class UnifiedClassifier:
         if use_cache and coin_id in self._cache:
             return self._cache[coin_id]
 
+        # 检查清单：元数据文件未变化时直接复用上次的分类结果
+        signature = None
+        if self._manifest is not None:
+            signature = self._metadata_signature(coin_id)
+            entry = self._manifest.get(coin_id) if use_cache else None
+            if entry is not None and signature is not None:
+                if entry.get("signature") == signature:
+                    result = ClassificationResult(**entry["result"])
+                    self._cache[coin_id] = result
+                    return result
+
         # 加载元数据
         metadata = self.downloader._load_coin_metadata(coin_id)
 
         if not metadata:
+            if self._manifest is not None and coin_id in self._manifest:
+                self._manifest.pop(coin_id, None)
+                self._manifest_dirty = True
             result = ClassificationResult(coin_id=coin_id, confidence="unknown")
             if use_cache:
                 self._cache[coin_id] = result
             return result
 
         # 分析分类
-        categories = metadata.get("categories", [])
-        categories_set = set(categories)
+        categories = metadata.get("categories") or []
 
         # 检查稳定币
         stablecoin_categories = []
@@ -130,6 +257,11 @@ class UnifiedClassifier:
         if use_cache:
             self._cache[coin_id] = result
 
+        # 记录到清单（签名在读取前获取，文件若在读取期间被修改下次会重新分类）
+        if self._manifest is not None and signature is not None:
+            self._manifest[coin_id] = {"signature": signature, "result": asdict(result)}
+            self._manifest_dirty = True
+
         return result
 
     def is_native_coin(self, coin_id: str, use_cache: bool = True) -> bool:
@@ -146,29 +278,54 @@ class UnifiedClassifier:
         return not result.is_stablecoin and not result.is_wrapped_coin
 
     def classify_coins_batch(
-        self, coin_ids: List[str], use_cache: bool = True
+        self,
+        coin_ids: List[str],
+        use_cache: bool = True,
+        max_workers: Optional[int] = None,
     ) -> Dict[str, ClassificationResult]:
         """批量分类币种
 
         Args:
             coin_ids: 币种ID列表
             use_cache: 是否使用缓存
+            max_workers: 加载元数据的线程数，None 表示按 CPU 数自动选择
 
         Returns:
             分类结果字典
         """
-        from tqdm import tqdm
-
-        results = {}
-
-        # 显示进度条当处理超过10个币种时
-        if len(coin_ids) > 10:
-            iterator = tqdm(coin_ids, desc="分类币种", unit="个")
+        # 只有未命中缓存的币种需要读取元数据文件
+        if use_cache:
+            pending = [coin_id for coin_id in coin_ids if coin_id not in self._cache]
         else:
-            iterator = coin_ids
+            pending = list(coin_ids)
+
+        # 元数据读取以文件 I/O 为主，币种较多时使用线程池并发加载
+        if len(pending) > 10:
+            if max_workers is None:
+                max_workers = min(32, (os.cpu_count() or 1) + 4)
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                classified = list(
+                    tqdm(
+                        executor.map(
+                            lambda coin_id: self.classify_coin(coin_id, use_cache),
+                            pending,
+                        ),
+                        total=len(pending),
+                        desc="分类币种",
+                        unit="个",
+                    )
+                )
+            fresh = dict(zip(pending, classified))
+        else:
+            fresh = {
+                coin_id: self.classify_coin(coin_id, use_cache) for coin_id in pending
+            }
 
-        for coin_id in iterator:
-            results[coin_id] = self.classify_coin(coin_id, use_cache)
+        results = {}
+        for coin_id in coin_ids:
+            results[coin_id] = (
+                fresh[coin_id] if coin_id in fresh else self._cache[coin_id]
+            )
 
         return results
 
@@ -267,8 +424,6 @@ class UnifiedClassifier:
             是否成功
         """
         try:
-            import pandas as pd
-
             results = self.classify_coins_batch(coin_ids)
 
             # 转换为DataFrame格式
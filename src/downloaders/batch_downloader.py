@@ -12,6 +12,7 @@
 
 import json
 import logging
+import threading
 import time
 from datetime import datetime, timezone
 from pathlib import Path
@@ -20,7 +21,13 @@ from typing import Any, Dict, List, Optional
 import pandas as pd
 from tqdm import tqdm
 
+try:
+    import orjson
+except ImportError:  # orjson 为可选依赖，未安装时使用标准库 json
+    orjson = None
+
 from ..api.coingecko import CoinGeckoAPI
+from ..utils.concurrent_utils import TokenBucket
 
 
 class BatchDownloader:
@@ -49,6 +56,10 @@ class BatchDownloader:
         self.metadata_dir = self.data_dir / "metadata"
         # 日志文件统一放在项目根目录的 logs/ 下
         self.logs_dir = self.base_dir / "logs"
+        # download_metadata.json 是读-改-写操作，并发下载时需串行化
+        self._metadata_lock = threading.Lock()
+        # 可选的共享令牌桶：设置后每次 API 请求（包括重试）前获取令牌
+        self.rate_limiter: Optional[TokenBucket] = None
 
         # 创建必要的目录结构
         self._ensure_directories()
@@ -264,6 +275,8 @@ class BatchDownloader:
         for attempt in range(max_retries):
             try:
                 # 调用 API 获取数据
+                if self.rate_limiter is not None:
+                    self.rate_limiter.acquire()
                 data = self.api.get_coin_market_chart(
                     coin_id=coin_id, vs_currency=vs_currency, days=days
                 )
@@ -356,22 +369,23 @@ class BatchDownloader:
         try:
             metadata_file = self.metadata_dir / "download_metadata.json"
 
-            # 读取现有元数据
-            metadata = {}
-            if metadata_file.exists():
-                with open(metadata_file, "r", encoding="utf-8") as f:
-                    metadata = json.load(f)
-
-            # 更新币种元数据
-            metadata[coin_id] = {
-                "last_update": datetime.now(timezone.utc).isoformat(),
-                "days": days,
-                "version": "1.0",
-            }
+            with self._metadata_lock:
+                # 读取现有元数据
+                metadata = {}
+                if metadata_file.exists():
+                    with open(metadata_file, "r", encoding="utf-8") as f:
+                        metadata = json.load(f)
+
+                # 更新币种元数据
+                metadata[coin_id] = {
+                    "last_update": datetime.now(timezone.utc).isoformat(),
+                    "days": days,
+                    "version": "1.0",
+                }
 
-            # 保存元数据
-            with open(metadata_file, "w", encoding="utf-8") as f:
-                json.dump(metadata, f, indent=2, ensure_ascii=False)
+                # 保存元数据
+                with open(metadata_file, "w", encoding="utf-8") as f:
+                    json.dump(metadata, f, indent=2, ensure_ascii=False)
 
         except Exception as e:
             self.logger.error(f"更新元数据失败 ({coin_id}): {e}")
@@ -606,6 +620,10 @@ class BatchDownloader:
         try:
             metadata_file = self.metadata_dir / "coin_metadata" / f"{coin_id}.json"
             if metadata_file.exists():
+                if orjson is not None:
+                    # 直接解析字节内容，省去 UTF-8 解码和 Python 层的 JSON 解析
+                    with open(metadata_file, "rb") as f:
+                        return orjson.loads(f.read())
                 with open(metadata_file, "r", encoding="utf-8") as f:
                     return json.load(f)
             return None
@@ -720,6 +738,8 @@ class BatchDownloader:
             self.logger.info(f"开始更新币种元数据 ({coin_id})")
 
             # 调用API获取完整的币种信息
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire()
             coin_data = self.api.get_coin_by_id(
                 coin_id=coin_id,
                 localization=False,  # 不需要本地化
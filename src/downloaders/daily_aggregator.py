@@ -17,11 +17,13 @@ import glob
 import logging
 import multiprocessing
 import os
+import threading
 from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import date, datetime, timedelta
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple, Union
 
+import numpy as np
 import pandas as pd
 
 # 配置日志
@@ -29,6 +31,24 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+def rank_by_market_cap(df: pd.DataFrame) -> pd.DataFrame:
+    """按市值降序排序并重新分配从1开始的排名
+
+    对连续的 float64 数组做稳定 argsort（缺失市值排在最后），
+    避免 sort_values 的索引重建开销。
+
+    Args:
+        df: 含 market_cap 列的DataFrame
+
+    Returns:
+        排序后带有 int32 rank 列的新DataFrame
+    """
+    order = np.argsort(-df["market_cap"].to_numpy(dtype=np.float64), kind="stable")
+    df = df.iloc[order].reset_index(drop=True)
+    df["rank"] = np.arange(1, len(df) + 1, dtype=np.int32)
+    return df
+
+
 class DailyDataAggregator:
     """每日数据聚合器
 
@@ -61,6 +81,8 @@ class DailyDataAggregator:
         self.daily_cache: Dict[str, pd.DataFrame] = {}
         self.coin_data: Dict[str, pd.DataFrame] = {}
         self.loaded_coins: List[str] = []
+        # 保护币种数据的延迟加载，避免多线程同时触发重复的全量加载
+        self._coin_data_lock = threading.Lock()
         logger.info(
             f"每日数据聚合器初始化, 数据源: '{data_dir}', 输出到: '{output_dir}'"
         )
@@ -105,22 +127,43 @@ class DailyDataAggregator:
 
         logger.info(f"成功加载 {len(self.loaded_coins)} 个币种的数据。")
 
+    def _ensure_coin_data_loaded(self) -> None:
+        """确保币种数据已加载（双重检查加锁，多线程下只加载一次）"""
+        if self.coin_data:
+            return
+        with self._coin_data_lock:
+            if not self.coin_data:
+                logger.info("内存中无币种数据，开始加载...")
+                self.load_coin_data()
+
+    def __getstate__(self) -> Dict:
+        # 进程池会序列化实例，锁对象不可序列化
+        state = self.__dict__.copy()
+        state.pop("_coin_data_lock", None)
+        return state
+
+    def __setstate__(self, state: Dict) -> None:
+        self.__dict__.update(state)
+        self._coin_data_lock = threading.Lock()
+
     def _calculate_date_range(self) -> None:
         """计算所有数据的日期范围"""
         if not self.coin_data:
             return
 
-        all_dates = []
+        # 日期为 YYYY-MM-DD 字符串，字典序即时间顺序：
+        # 先在每个币种内取极值，最后只解析两个日期，而不是逐行 strptime
+        coin_min_dates = []
+        coin_max_dates = []
         for df in self.coin_data.values():
-            all_dates.extend(df["date"].tolist())
+            if not df.empty:
+                coin_min_dates.append(df["date"].min())
+                coin_max_dates.append(df["date"].max())
 
-        if all_dates:
+        if coin_min_dates:
             # 将字符串日期转换为 datetime 对象以支持日期运算
-            from datetime import datetime
-
-            date_objects = [datetime.strptime(d, "%Y-%m-%d") for d in all_dates]
-            self.min_date = min(date_objects)
-            self.max_date = max(date_objects)
+            self.min_date = datetime.strptime(min(coin_min_dates), "%Y-%m-%d")
+            self.max_date = datetime.strptime(max(coin_max_dates), "%Y-%m-%d")
 
             logger.info(f"数据日期范围: {self.min_date} 到 {self.max_date}")
 
@@ -182,9 +225,7 @@ class DailyDataAggregator:
                 logger.warning(f"读取缓存文件 {daily_file_path} 失败，将重新计算: {e}")
 
         # 如果需要，加载币种数据
-        if not self.coin_data:
-            logger.info("内存中无币种数据，开始加载...")
-            self.load_coin_data()
+        self._ensure_coin_data_loaded()
 
         logger.info(
             f"开始为 {target_date_str} 计算每日数据 (强制刷新: {force_refresh})"
@@ -273,10 +314,7 @@ class DailyDataAggregator:
             merged_daily_data = pd.concat(all_daily_data, ignore_index=True)
 
             # 强制按市值排序并重新分配rank
-            merged_daily_data = merged_daily_data.sort_values(
-                "market_cap", ascending=False
-            ).reset_index(drop=True)
-            merged_daily_data["rank"] = merged_daily_data.index + 1
+            merged_daily_data = rank_by_market_cap(merged_daily_data)
 
             # 保存合并后的数据到文件
             merged_daily_file = self.output_dir / "merged_daily_data.csv"
@@ -365,12 +403,21 @@ class DailyDataAggregator:
         if not self.daily_files_dir.exists():
             return dates
 
-        for year_dir in self.daily_files_dir.iterdir():
-            if year_dir.is_dir():
-                for month_dir in year_dir.iterdir():
-                    if month_dir.is_dir():
-                        for file in month_dir.glob("*.csv"):
-                            dates.append(file.stem)
+        # 使用 os.scandir 遍历 YYYY/MM 结构，目录项自带类型信息，避免额外 stat
+        with os.scandir(self.daily_files_dir) as year_entries:
+            for year_entry in year_entries:
+                if not year_entry.is_dir():
+                    continue
+                with os.scandir(year_entry.path) as month_entries:
+                    for month_entry in month_entries:
+                        if not month_entry.is_dir():
+                            continue
+                        with os.scandir(month_entry.path) as file_entries:
+                            dates.extend(
+                                entry.name[:-4]
+                                for entry in file_entries
+                                if entry.name.endswith(".csv")
+                            )
 
         return sorted(dates)
 
@@ -484,9 +531,7 @@ class DailyDataAggregator:
 
         # 添加排名
         if "market_cap" in final_df.columns:
-            final_df = final_df.sort_values("market_cap", ascending=False)
-            final_df = final_df.reset_index(drop=True)
-            final_df["rank"] = final_df.index + 1
+            final_df = rank_by_market_cap(final_df)
 
         return final_df
 
@@ -701,10 +746,8 @@ class DailyDataAggregator:
                 )
                 return False
 
-            # 市值字段降序排序
-            df_sorted = df.sort_values(by="market_cap", ascending=False)
-            # 重新赋值排名
-            df_sorted["rank"] = range(1, len(df_sorted) + 1)
+            # 市值字段降序排序并重新赋值排名
+            df_sorted = rank_by_market_cap(df)
 
             if dry_run:
                 self.logger.info(
@@ -12,21 +12,24 @@
 
 import logging
 import os
-import sys
-from datetime import date, datetime
+from datetime import date
 from pathlib import Path
-from typing import Dict, List, Optional, Union
+from typing import Dict, List, Optional, Tuple, Union
 
+import numpy as np
 import pandas as pd
 from tqdm import tqdm
 
-# 添加项目根目录到Python路径
-sys.path.insert(
-    0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-)
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.csv as pacsv
+    import pyarrow.dataset as ds
+except ImportError:  # pyarrow 为可选依赖，仅 Parquet 缓存需要
+    pa = None
 
-from src.classification.unified_classifier import UnifiedClassifier
-from src.downloaders.daily_aggregator import DailyDataAggregator
+from ..classification.unified_classifier import UnifiedClassifier
+from ..downloaders.daily_aggregator import DailyDataAggregator
 
 
 class MarketCapWeightedIndexCalculator:
@@ -39,6 +42,7 @@ class MarketCapWeightedIndexCalculator:
         exclude_stablecoins: bool = True,
         exclude_wrapped_coins: bool = True,
         force_rebuild: bool = False,
+        use_parquet_cache: bool = False,
     ):
         """
         初始化指数计算器
@@ -49,6 +53,7 @@ class MarketCapWeightedIndexCalculator:
             exclude_stablecoins: 是否排除稳定币
             exclude_wrapped_coins: 是否排除包装币
             force_rebuild: 是否强制重建每日数据文件
+            use_parquet_cache: 是否使用 Parquet 面板缓存加速每日数据加载（需要 pyarrow）
 
         注意：
         - 核心数据来源：{daily_output_dir}/daily_files/
@@ -58,6 +63,18 @@ class MarketCapWeightedIndexCalculator:
         self.exclude_stablecoins = exclude_stablecoins
         self.exclude_wrapped_coins = exclude_wrapped_coins
         self.force_rebuild = force_rebuild
+        self.use_parquet_cache = use_parquet_cache
+
+        # Parquet 面板缓存：所有每日文件合并后按 year/month 分区存储
+        self.panel_dir = self.daily_output_dir / "_panel"
+
+        # 每日数据缓存：日期字符串 -> 当日数据
+        self._daily_cache: Dict[str, pd.DataFrame] = {}
+
+        # 前N名成分缓存：(日期字符串, top_n) -> (成分元组, 只读权重数组, 总市值)
+        self._top_coins_cache: Dict[
+            Tuple[str, int], Tuple[Tuple[str, ...], np.ndarray, float]
+        ] = {}
 
         # 初始化每日数据聚合器 - 核心数据源
         self.daily_aggregator = DailyDataAggregator(
@@ -74,92 +91,152 @@ class MarketCapWeightedIndexCalculator:
         # 设置日志
         self.logger = logging.getLogger(__name__)
 
-    def _load_coin_data(self, coin_id: str) -> Optional[pd.DataFrame]:
+    def _get_daily_data_cached(self, target_date: date) -> pd.DataFrame:
         """
-        加载单个币种的价格数据
+        获取指定日期的每日数据（带缓存）
 
         Args:
-            coin_id: 币种ID（文件名不含.csv后缀）
+            target_date: 目标日期
 
         Returns:
-            包含价格数据的DataFrame，如果文件不存在返回None
+            当日所有币种数据的DataFrame
         """
-        csv_path = self.data_dir / f"{coin_id}.csv"
-        if not csv_path.exists():
-            return None
+        # 检查是否已经在缓存中
+        cache_key = target_date.isoformat()
+        cached_df = self._daily_cache.get(cache_key)
+        if cached_df is not None:
+            return cached_df
 
-        try:
-            df = pd.read_csv(csv_path)
-            # 转换时间戳为日期
-            df["date"] = pd.to_datetime(df["timestamp"], unit="ms").dt.date
-            df = df.sort_values("date")
-            return df
-        except Exception as e:
-            self.logger.warning(f"读取 {coin_id} 数据失败: {e}")
-            return None
+        # 从数据源获取（只有第一次会强制刷新）
+        force_refresh = self.force_rebuild
+        daily_df = self.daily_aggregator.get_daily_data(
+            target_date, force_refresh=force_refresh
+        )
+
+        # 缓存结果
+        self._daily_cache[cache_key] = daily_df
+        return daily_df
 
-    def _get_available_coins(self) -> List[str]:
+    def _build_panel_parquet(self) -> bool:
         """
-        获取所有可用的币种ID列表
+        将所有每日汇总文件合并为一个按 year/month 分区的 Parquet 数据集
 
         Returns:
-            币种ID列表
+            是否构建成功
         """
-        coins = []
-        for csv_file in self.data_dir.glob("*.csv"):
-            coin_id = csv_file.stem
+        daily_files = self.daily_aggregator._find_all_daily_files()
+        if not daily_files:
+            self.logger.warning("没有找到每日汇总文件，无法构建 Parquet 缓存")
+            return False
+
+        convert_options = pacsv.ConvertOptions(
+            column_types={
+                "timestamp": pa.int64(),
+                "price": pa.float64(),
+                "volume": pa.float64(),
+                "market_cap": pa.float64(),
+                "date": pa.date32(),
+                "coin_id": pa.string(),
+                "rank": pa.int64(),
+            }
+        )
 
-            # 使用统一分类器进行过滤 (性能优化：一次调用获取所有分类信息)
-            if self.exclude_stablecoins or self.exclude_wrapped_coins:
-                try:
-                    classification_result = self.classifier.classify_coin(coin_id)
+        tables = []
+        for file_path in tqdm(daily_files, desc="构建 Parquet 缓存", unit="个文件"):
+            try:
+                tables.append(
+                    pacsv.read_csv(file_path, convert_options=convert_options)
+                )
+            except Exception as e:
+                self.logger.warning(f"读取每日文件 {file_path} 失败，跳过: {e}")
+
+        if not tables:
+            return False
+
+        table = pa.concat_tables(tables, promote_options="default")
+        table = table.append_column("year", pc.year(table["date"]))
+        table = table.append_column("month", pc.month(table["date"]))
+
+        ds.write_dataset(
+            table,
+            self.panel_dir,
+            format="parquet",
+            partitioning=["year", "month"],
+            partitioning_flavor="hive",
+            file_options=ds.ParquetFileFormat().make_write_options(compression="zstd"),
+            existing_data_behavior="delete_matching",
+        )
+        # 标记文件的修改时间即为缓存构建时间（"_" 前缀不会被数据集扫描）
+        (self.panel_dir / "_built").touch()
 
-                    # 检查是否需要排除稳定币
-                    if self.exclude_stablecoins and classification_result.is_stablecoin:
-                        continue
+        self.logger.info(
+            f"Parquet 缓存构建完成: {len(tables)} 个每日文件, {table.num_rows} 条记录"
+        )
+        return True
 
-                    # 检查是否需要排除包装币
-                    if (
-                        self.exclude_wrapped_coins
-                        and classification_result.is_wrapped_coin
-                    ):
-                        continue
-                except Exception:
-                    # 如果检查失败，保守处理，不排除
-                    pass
+    def _is_panel_stale(self, start_dt: date, end_dt: date) -> bool:
+        """
+        检查 Parquet 缓存是否缺失或早于日期范围内的每日文件
 
-            coins.append(coin_id)
+        Args:
+            start_dt: 开始日期
+            end_dt: 结束日期
 
-        return coins
+        Returns:
+            是否需要重建缓存
+        """
+        marker = self.panel_dir / "_built"
+        if not marker.exists():
+            return True
 
-    def _get_daily_data_cached(self, target_date: date) -> pd.DataFrame:
+        built_at = marker.stat().st_mtime
+        range_files = self.daily_aggregator._find_files_by_date_range(
+            start_dt.isoformat(), end_dt.isoformat()
+        )
+        return any(os.path.getmtime(f) > built_at for f in range_files)
+
+    def _load_range(self, start_dt: date, end_dt: date) -> Optional[pd.DataFrame]:
         """
-        获取指定日期的每日数据（带缓存）
+        从 Parquet 缓存加载日期范围内的长表数据，缓存过期时自动重建
 
         Args:
-            target_date: 目标日期
+            start_dt: 开始日期
+            end_dt: 结束日期
 
         Returns:
-            当日所有币种数据的DataFrame
+            包含范围内所有币种每日数据的DataFrame，不可用时返回None
         """
-        # 检查是否已经在缓存中
-        cache_key = target_date.isoformat()
-        if hasattr(self, "_daily_cache") and cache_key in self._daily_cache:
-            return self._daily_cache[cache_key]
+        if pa is None:
+            self.logger.warning("未安装 pyarrow，无法使用 Parquet 缓存")
+            return None
 
-        # 初始化缓存
-        if not hasattr(self, "_daily_cache"):
-            self._daily_cache = {}
+        if self._is_panel_stale(start_dt, end_dt):
+            self.logger.info("Parquet 缓存不存在或已过期，开始重建")
+            if not self._build_panel_parquet():
+                return None
 
-        # 从数据源获取（只有第一次会强制刷新）
-        force_refresh = self.force_rebuild and cache_key not in self._daily_cache
-        daily_df = self.daily_aggregator.get_daily_data(
-            target_date, force_refresh=force_refresh
+        dataset = ds.dataset(self.panel_dir, format="parquet", partitioning="hive")
+        table = dataset.to_table(
+            filter=(pc.field("date") >= start_dt) & (pc.field("date") <= end_dt)
         )
+        return table.drop_columns(["year", "month"]).to_pandas(self_destruct=True)
 
-        # 缓存结果
-        self._daily_cache[cache_key] = daily_df
-        return daily_df
+    def _prefill_daily_cache(self, start_dt: date, end_dt: date) -> None:
+        """
+        用 Parquet 缓存一次性填充每日数据缓存，避免逐日读取CSV
+
+        Args:
+            start_dt: 开始日期
+            end_dt: 结束日期
+        """
+        panel_df = self._load_range(start_dt, end_dt)
+        if panel_df is None or panel_df.empty:
+            return
+
+        for day, day_df in panel_df.groupby("date", sort=False):
+            self._daily_cache[day.isoformat()] = day_df.reset_index(drop=True)
+
+        self.logger.info(f"已从 Parquet 缓存加载 {panel_df['date'].nunique()} 天的数据")
 
     def _get_daily_market_caps(self, target_date: date) -> Dict[str, float]:
         """
@@ -197,12 +274,16 @@ class MarketCapWeightedIndexCalculator:
             # 过滤稳定币和包装币
             filtered_df = self._filter_coins(daily_df)
 
-            # 转换为字典，只保留有效的市值数据
-            market_caps = {}
-            for _, row in filtered_df.iterrows():
-                market_cap = row["market_cap"]
-                if pd.notna(market_cap) and market_cap > 0:
-                    market_caps[row["coin_id"]] = float(market_cap)
+            # 转换为字典，只保留有效的市值数据，同一币种重复时以最后一条为准
+            # （NaN 与任何数比较均为 False，一个比较即可同时排除缺失值）
+            caps = filtered_df["market_cap"].to_numpy(dtype=np.float64)
+            valid = caps > 0
+            market_caps = dict(
+                zip(
+                    filtered_df["coin_id"].to_numpy()[valid].tolist(),
+                    caps[valid].tolist(),
+                )
+            )
 
             self.logger.debug(
                 f"日期 {target_date}: 获取到 {len(market_caps)} 个币种的市值数据"
@@ -213,6 +294,52 @@ class MarketCapWeightedIndexCalculator:
             self.logger.error(f"获取日期 {target_date} 的市值数据失败: {e}")
             return {}
 
+    def _load_market_cap_panel(self, dates: List[date]) -> pd.DataFrame:
+        """
+        加载多个日期的有效市值数据，合并为一个长表并统一过滤
+
+        所有日期合并后只调用一次分类过滤，避免逐日重复过滤
+
+        Args:
+            dates: 日期列表
+
+        Returns:
+            列为 date, coin_id, market_cap 的DataFrame（只包含有效的正市值）
+        """
+        frames = []
+        for target_date in tqdm(dates, desc="加载每日市值数据", unit="天", ncols=100):
+            try:
+                daily_df = self._get_daily_data_cached(target_date)
+            except Exception as e:
+                # 单日加载失败只跳过该日，不中断整个区间的计算
+                self.logger.error(f"获取日期 {target_date} 的市值数据失败: {e}")
+                continue
+            if (
+                daily_df.empty
+                or "coin_id" not in daily_df.columns
+                or "market_cap" not in daily_df.columns
+            ):
+                continue
+            frames.append(
+                pd.DataFrame(
+                    {
+                        "date": target_date,
+                        "coin_id": daily_df["coin_id"].to_numpy(),
+                        "market_cap": daily_df["market_cap"].to_numpy(dtype=np.float64),
+                    }
+                )
+            )
+
+        if not frames:
+            return pd.DataFrame(columns=["date", "coin_id", "market_cap"])
+
+        panel_df = self._filter_coins(pd.concat(frames, ignore_index=True))
+
+        # 只保留有效的市值数据，同一天同一币种重复时以最后一条为准
+        # （NaN 与任何数比较均为 False，一个比较即可同时排除缺失值）
+        panel_df = panel_df[panel_df["market_cap"].to_numpy() > 0]
+        return panel_df.drop_duplicates(["date", "coin_id"], keep="last")
+
     def _select_top_coins(self, market_caps: Dict[str, float], top_n: int) -> List[str]:
         """
         根据市值选择前N名币种
@@ -224,8 +351,76 @@ class MarketCapWeightedIndexCalculator:
         Returns:
             按市值排序的前N名币种ID列表
         """
-        sorted_coins = sorted(market_caps.items(), key=lambda x: x[1], reverse=True)
-        return [coin_id for coin_id, _ in sorted_coins[:top_n]]
+        constituents, _, _ = self._select_top_coins_with_weights(market_caps, top_n)
+        return constituents
+
+    def _select_top_coins_with_weights(
+        self, market_caps: Dict[str, float], top_n: int
+    ) -> Tuple[List[str], np.ndarray, float]:
+        """
+        一次遍历完成前N名选择、总市值求和与权重计算
+
+        使用 np.argpartition 选出前N名（O(n)），只对这N个元素排序，
+        前N名的总市值和权重复用同一次取值结果。
+
+        Args:
+            market_caps: 币种市值字典
+            top_n: 选择数量
+
+        Returns:
+            (按市值降序的前N名币种ID列表, 对应的权重数组, 前N名总市值)
+        """
+        if top_n <= 0 or not market_caps:
+            return [], np.empty(0, dtype=np.float64), 0.0
+
+        coin_ids = np.fromiter(market_caps.keys(), dtype=object, count=len(market_caps))
+        caps = np.fromiter(
+            market_caps.values(), dtype=np.float64, count=len(market_caps)
+        )
+
+        if top_n < len(caps):
+            top_idx = np.argpartition(-caps, top_n - 1)[:top_n]
+        else:
+            top_idx = np.arange(len(caps))
+        top_idx = top_idx[np.argsort(-caps[top_idx], kind="stable")]
+
+        top_caps = caps[top_idx]
+        total_market_cap = float(top_caps.sum())
+        return coin_ids[top_idx].tolist(), top_caps / total_market_cap, total_market_cap
+
+    def _get_top_coins_cached(
+        self, target_date: date, top_n: int
+    ) -> Tuple[Tuple[str, ...], np.ndarray, float]:
+        """
+        获取指定日期前N名成分、权重和总市值（带缓存）
+
+        同一基准日在指数计算和逐日分析中会被反复使用，
+        缓存不可变的结果，避免重复加载、过滤和排序。
+
+        Args:
+            target_date: 目标日期
+            top_n: 成分数量
+
+        Returns:
+            (按市值降序的成分币种元组, 只读权重数组, 前N名总市值)
+        """
+        cache_key = (target_date.isoformat(), top_n)
+        cached = self._top_coins_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        constituents, weights, total_market_cap = self._select_top_coins_with_weights(
+            self._get_daily_market_caps(target_date), top_n
+        )
+        weights.flags.writeable = False
+        result = (tuple(constituents), weights, total_market_cap)
+        self._top_coins_cache[cache_key] = result
+        return result
+
+    def clear_cache(self) -> None:
+        """清空每日数据缓存和前N名成分缓存"""
+        self._daily_cache.clear()
+        self._top_coins_cache.clear()
 
     def _calculate_weights(
         self, coin_ids: List[str], market_caps: Dict[str, float]
@@ -264,24 +459,38 @@ class MarketCapWeightedIndexCalculator:
         Returns:
             价格，如果无数据返回None
         """
+        price = self._get_prices_batch([coin_id], target_date).iloc[0]
+        return float(price) if pd.notna(price) else None
+
+    def _get_prices_batch(self, coin_ids: List[str], target_date: date) -> pd.Series:
+        """
+        批量获取多个币种在指定日期的价格
+
+        对当日数据建立一次 coin_id 索引后整体 reindex，
+        避免逐个币种对整表做布尔筛选
+
+        Args:
+            coin_ids: 币种ID列表
+            target_date: 目标日期
+
+        Returns:
+            以 coin_id 为索引的价格Series，无数据或价格无效的币种为 NaN
+        """
         try:
             # 使用缓存的数据获取方法
             daily_df = self._get_daily_data_cached(target_date)
 
-            if daily_df.empty:
-                return None
-
-            coin_data = daily_df[daily_df["coin_id"] == coin_id]
+            if daily_df.empty or "price" not in daily_df.columns:
+                return pd.Series(np.nan, index=coin_ids, dtype=np.float64)
 
-            if coin_data.empty:
-                return None
-
-            price = coin_data.iloc[0]["price"]
-            return float(price) if pd.notna(price) and price > 0 else None
+            # 同一币种有多条记录时取第一条
+            prices = daily_df.drop_duplicates("coin_id").set_index("coin_id")["price"]
+            prices = prices.where(prices > 0).reindex(coin_ids)
+            return prices.astype(np.float64)
 
         except Exception as e:
-            self.logger.warning(f"获取 {coin_id} 在 {target_date} 的价格失败: {e}")
-            return None
+            self.logger.warning(f"批量获取 {target_date} 的价格失败: {e}")
+            return pd.Series(np.nan, index=coin_ids, dtype=np.float64)
 
     def _filter_coins(self, df: pd.DataFrame) -> pd.DataFrame:
         """
@@ -296,30 +505,53 @@ class MarketCapWeightedIndexCalculator:
         if df.empty or "coin_id" not in df.columns:
             return df
 
-        filtered_df = df.copy()
+        if not (self.exclude_stablecoins or self.exclude_wrapped_coins):
+            return df
 
         # 使用统一分类器进行批量过滤 (性能优化)
-        if self.exclude_stablecoins or self.exclude_wrapped_coins:
-            coin_ids = df["coin_id"].tolist()
-
-            # 批量过滤，一次调用处理所有币种
-            filtered_coin_ids = self.classifier.filter_coins(
-                coin_ids=coin_ids,
-                exclude_stablecoins=self.exclude_stablecoins,
-                exclude_wrapped_coins=self.exclude_wrapped_coins,
-                use_cache=True,
-            )
+        # 多日长表中同一币种重复出现，只需对去重后的币种分类一次
+        codes, unique_coin_ids = pd.factorize(df["coin_id"])
+        coin_ids = unique_coin_ids.tolist()
+
+        # 批量过滤，一次调用处理所有币种
+        filtered_coin_ids = self.classifier.filter_coins(
+            coin_ids=coin_ids,
+            exclude_stablecoins=self.exclude_stablecoins,
+            exclude_wrapped_coins=self.exclude_wrapped_coins,
+            use_cache=True,
+        )
 
-            # 只保留过滤后的币种
-            filtered_df = filtered_df[filtered_df["coin_id"].isin(filtered_coin_ids)]
+        # 只保留过滤后的币种：在去重币种上计算保留掩码，再按编码广播到每一行
+        # （布尔索引本身返回新的DataFrame，无需预先复制）
+        kept = set(filtered_coin_ids)
+        # 末尾追加 False：缺失的 coin_id 编码为 -1，正好索引到该位置而被剔除
+        keep_unique = np.append(
+            np.fromiter((coin_id in kept for coin_id in coin_ids), dtype=bool), False
+        )
+        filtered_df = df[keep_unique[codes]]
 
-            self.logger.debug(
-                f"分类过滤: {len(df)} -> {len(filtered_df)} "
-                f"(排除稳定币: {self.exclude_stablecoins}, 排除包装币: {self.exclude_wrapped_coins})"
-            )
+        self.logger.debug(
+            f"分类过滤: {len(df)} -> {len(filtered_df)} "
+            f"(排除稳定币: {self.exclude_stablecoins}, 排除包装币: {self.exclude_wrapped_coins})"
+        )
 
         return filtered_df
 
+    @staticmethod
+    def _to_date(value: Union[str, date]) -> date:
+        """
+        将 YYYY-MM-DD 字符串统一转换为 date 对象
+
+        Args:
+            value: 日期字符串或date对象
+
+        Returns:
+            date对象
+        """
+        if isinstance(value, str):
+            return pd.to_datetime(value, format="%Y-%m-%d").date()
+        return value
+
     def calculate_index(
         self,
         start_date: Union[str, date],
@@ -357,29 +589,22 @@ class MarketCapWeightedIndexCalculator:
             )
 
         # 转换日期字符串为date对象
-        if isinstance(start_date, str):
-            start_dt = datetime.strptime(start_date, "%Y-%m-%d").date()
-        else:
-            start_dt = start_date
+        start_dt = self._to_date(start_date)
+        end_dt = self._to_date(end_date)
+        base_dt = start_dt if base_date is None else self._to_date(base_date)
 
-        if isinstance(end_date, str):
-            end_dt = datetime.strptime(end_date, "%Y-%m-%d").date()
-        else:
-            end_dt = end_date
-
-        if base_date is None:
-            base_dt = start_dt
-        elif isinstance(base_date, str):
-            base_dt = datetime.strptime(base_date, "%Y-%m-%d").date()
-        else:
-            base_dt = base_date
+        # 强制重建时每日文件会重新生成，此时不使用 Parquet 缓存
+        if self.use_parquet_cache and not self.force_rebuild:
+            self._prefill_daily_cache(min(start_dt, base_dt), max(end_dt, base_dt))
 
         # 获取基准日期的市值数据和成分币种
-        base_market_caps = self._get_daily_market_caps(base_dt)
-        if not base_market_caps:
+        # ✅ 关键修正：选出基准日前N名并直接得到其总市值（float64 求和）
+        base_constituents, _, base_total_market_cap = self._get_top_coins_cached(
+            base_dt, top_n
+        )
+        if not base_constituents:
             raise ValueError(f"基准日期 {base_date} 没有可用的市值数据")
 
-        base_constituents = self._select_top_coins(base_market_caps, top_n)
         actual_base_count = len(base_constituents)
 
         if actual_base_count < top_n:
@@ -388,83 +613,45 @@ class MarketCapWeightedIndexCalculator:
                 f"不足以满足 top_n={top_n} 的要求。"
             )
 
-        # ✅ 关键修正：直接计算基准日前N名总市值
-        base_total_market_cap = sum(
-            base_market_caps[coin_id] for coin_id in base_constituents
-        )
-
         self.logger.info(f"✅ 基准日期 {base_dt} 前{top_n}名币种")
-        self.logger.info(f"前5名: {base_constituents[:5]}")
+        self.logger.info(f"前5名: {list(base_constituents[:5])}")
         self.logger.info(f"✅ 基准日总市值: ${base_total_market_cap:,.0f}")
 
         # 生成日期范围
-        date_range = pd.date_range(start=start_dt, end=end_dt, freq="D")
-
-        index_data = []
-
-        # 使用进度条显示计算进度
-        with tqdm(
-            total=len(date_range),
-            desc=f"计算正确的市值加权指数 (前{top_n}名)",
-            unit="天",
-            ncols=100,
-        ) as pbar:
-            for i, current_dt in enumerate(date_range):
-                current_date = current_dt.date()
-
-                # 更新进度条显示当前日期
-                pbar.set_description(
-                    f"计算正确的市值加权指数 - {current_date} ({i+1}/{len(date_range)})"
-                )
-
-                # 获取当日市值数据和成分币种
-                current_market_caps = self._get_daily_market_caps(current_date)
-                if not current_market_caps:
-                    self.logger.warning(f"日期 {current_date} 没有可用的市值数据，跳过")
-                    pbar.set_postfix_str(f"跳过: {current_date}")
-                    pbar.update(1)
-                    continue
-
-                current_constituents = self._select_top_coins(
-                    current_market_caps, top_n
-                )
-                if not current_constituents:
-                    self.logger.warning(f"日期 {current_date} 没有找到成分币种，跳过")
-                    pbar.set_postfix_str(f"跳过: {current_date}")
-                    pbar.update(1)
-                    continue
-
-                # ✅ 关键修正：直接计算当日前N名总市值，无需价格计算
-                current_total_market_cap = sum(
-                    current_market_caps[coin_id] for coin_id in current_constituents
-                )
+        date_range = [
+            d.date() for d in pd.date_range(start=start_dt, end=end_dt, freq="D")
+        ]
 
-                # ✅ 正确的指数计算公式：直接市值比较
-                index_value = base_value * (
-                    current_total_market_cap / base_total_market_cap
-                )
+        # 一次性加载整个日期范围的市值长表，统一过滤后批量计算
+        panel_df = self._load_market_cap_panel(date_range)
 
-                index_data.append(
-                    {
-                        "date": current_date,
-                        "index_value": index_value,
-                        "constituent_count": len(current_constituents),
-                    }
-                )
+        missing_dates = sorted(set(date_range) - set(panel_df["date"]))
+        for missing_date in missing_dates:
+            self.logger.warning(f"日期 {missing_date} 没有可用的市值数据，跳过")
 
-                # 更新进度条
-                pbar.set_postfix_str(f"指数值: {index_value:.2f}")
-                pbar.update(1)
-
-                if len(index_data) % 100 == 0:
-                    self.logger.info(f"已处理 {len(index_data)} 个交易日")
+        # ✅ 关键修正：直接计算每日前N名总市值，无需价格计算（float64 求和）
+        panel_df = panel_df.sort_values(
+            ["date", "market_cap"], ascending=[True, False], kind="stable"
+        )
+        top_df = panel_df.groupby("date", sort=False).head(top_n)
+        daily_totals = top_df.groupby("date", sort=True)["market_cap"].agg(
+            ["sum", "count"]
+        )
 
-        if not index_data:
+        if daily_totals.empty:
             raise ValueError(
                 f"无法生成指数数据，时间范围 {start_date} 到 {end_date} 内没有可用数据"
             )
 
-        result_df = pd.DataFrame(index_data)
+        # ✅ 正确的指数计算公式：直接市值比较
+        result_df = pd.DataFrame(
+            {
+                "date": daily_totals.index,
+                "index_value": base_value
+                * (daily_totals["sum"].to_numpy() / base_total_market_cap),
+                "constituent_count": daily_totals["count"].to_numpy(),
+            }
+        )
 
         self.logger.info(f"✅ 指数计算完成，共生成 {len(result_df)} 个数据点")
         self.logger.info(
@@ -6,23 +6,357 @@
 特性：并行处理、错误恢复、自动排序
 """
 
+import csv
 import json
 import logging
+import math
+import multiprocessing
+import os
 import shutil
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from datetime import date, datetime
 from pathlib import Path
 from typing import Dict, List, Optional, Set, Tuple
 
+import numpy as np
 import pandas as pd
 from tqdm import tqdm
 
+try:
+    import orjson
+except ImportError:  # orjson 为可选依赖，未安装时使用标准库 json
+    orjson = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+except ImportError:  # pyarrow 为可选依赖，未安装时使用 pandas 解析币种CSV
+    pa = None
+
 from ..api.coingecko import CoinGeckoAPI
 from ..downloaders.batch_downloader import create_batch_downloader
+from ..downloaders.daily_aggregator import rank_by_market_cap
 from ..updaters.price_updater import MarketDataFetcher
 
 logger = logging.getLogger(__name__)
 
+# 币种历史数据文件的列及类型
+COIN_FILE_DTYPES = {
+    "timestamp": "int64",
+    "price": "float64",
+    "volume": "float64",
+    "market_cap": "float64",
+}
+
+# 每日数据文件的列顺序（rank 在排序后写入）
+DAILY_FILE_COLUMNS = ["timestamp", "price", "volume", "market_cap", "date", "coin_id"]
+
+# 读取每日数据文件时固定的列类型，跳过 C 解析器的类型推断
+DAILY_FILE_DTYPES = {
+    "price": "float64",
+    "volume": "float64",
+    "market_cap": "float64",
+    "date": str,
+    "coin_id": str,
+}
+
+
+def _csv_value(value):
+    """将新插入记录的值转换为 CSV 文本（缺失值写为空，与 pandas.to_csv 一致）"""
+    if isinstance(value, float) and math.isnan(value):
+        return ""
+    return value
+
+
+def _market_cap_sort_key(row: Dict) -> Tuple[bool, float]:
+    """每日文件行的排序键：按市值降序，缺失市值排在最后"""
+    value = row["market_cap"]
+    market_cap = float(value) if value not in ("", None) else math.nan
+    if math.isnan(market_cap):
+        return True, 0.0
+    return False, -market_cap
+
+
+def _tmp_path(filepath: Path) -> Path:
+    """每日文件写入时使用的临时文件路径（同目录，保证 os.replace 为原子操作）"""
+    return filepath.with_name(filepath.name + ".tmp")
+
+
+def _backup_file(filepath: Path, ts_suffix: Optional[str] = None) -> Optional[Path]:
+    """备份每日数据文件，只保留最新的几个备份（不依赖实例，可在子进程中执行）
+
+    Args:
+        filepath: 要备份的文件路径
+        ts_suffix: 备份文件名的时间戳后缀，None表示使用当前时间
+
+    Returns:
+        备份文件路径，失败则返回None
+    """
+    try:
+        # 创建备份目录
+        backup_dir = filepath.parent / ".backup"
+        backup_dir.mkdir(exist_ok=True)
+
+        # 智能备份：只保留最新的3个备份
+        existing_backups = sorted(
+            backup_dir.glob(f"{filepath.stem}_*.csv"),
+            key=lambda x: x.stat().st_mtime,
+            reverse=True,
+        )
+
+        # 删除超过3个的旧备份
+        for old_backup in existing_backups[2:]:  # 保留最新2个，第3个开始删除
+            try:
+                old_backup.unlink()
+                logger.debug(f"删除旧备份: {old_backup}")
+            except Exception as e:
+                logger.warning(f"删除旧备份失败: {e}")
+
+        # 生成备份文件名（包含时间戳），同一批次共用时间戳时追加序号避免覆盖
+        timestamp = ts_suffix or datetime.now().strftime("%Y%m%d_%H%M%S")
+        backup_path = backup_dir / f"{filepath.stem}_{timestamp}.csv"
+        index = 1
+        while backup_path.exists():
+            backup_path = backup_dir / f"{filepath.stem}_{timestamp}_{index}.csv"
+            index += 1
+
+        # 复制文件：每日聚合器等写入方会原地覆盖每日文件，硬链接备份会随之改变
+        shutil.copy2(filepath, backup_path)
+        logger.debug(f"已备份文件: {backup_path}")
+        return backup_path
+
+    except Exception as e:
+        logger.warning(f"备份文件失败 {filepath}: {e}")
+        return None
+
+
+def _write_day(
+    filepath: Path,
+    rows: List[Dict],
+    backup: bool = False,
+    ts_suffix: Optional[str] = None,
+) -> Tuple[bool, str, Dict[str, int]]:
+    """将同一日期的多个币种数据写入每日文件（不依赖实例，可在子进程中执行）
+
+    只读写一次文件、只排序一次，已存在的币种会被跳过。
+    只有确实需要写入时才备份现有文件；写入通过临时文件原子替换，失败时原文件保持不变。
+
+    Args:
+        filepath: 每日数据文件路径
+        rows: 币种数据字典列表（同一日期）
+        backup: 是否在写入前备份现有文件
+        ts_suffix: 备份文件名的时间戳后缀，None表示使用当前时间
+
+    Returns:
+        (是否成功, 错误信息, 新插入币种到排名的字典)
+    """
+    try:
+        # 确保目录存在
+        filepath.parent.mkdir(parents=True, exist_ok=True)
+
+        # 每日文件只有几百行，用 csv 模块逐行读写，避免 DataFrame 的构建开销；
+        # 已有行按原文本写回，不会被重新格式化
+        fieldnames = None
+        day_rows: List[Dict] = []
+        if filepath.exists():
+            with open(filepath, newline="", encoding="utf-8") as f:
+                reader = csv.DictReader(f)
+                day_rows = list(reader)
+                fieldnames = reader.fieldnames
+
+        if fieldnames is None:
+            # 创建新文件（或现有文件为空）
+            fieldnames = DAILY_FILE_COLUMNS + ["rank"]
+
+        # 检查哪些币种已存在（一次集合差运算）
+        existing_ids = {row["coin_id"] for row in day_rows}
+        new_rows = [row for row in rows if row["coin_id"] not in existing_ids]
+        if not new_rows:
+            return True, "", {}
+
+        for row in new_rows:
+            day_rows.append({key: _csv_value(value) for key, value in row.items()})
+
+        # 重新排序并更新排名：市值降序，缺失市值排在最后（稳定排序保持原有顺序）
+        day_rows.sort(key=_market_cap_sort_key)
+        # 排序后的位置即排名，赋值时顺带记录新币种的排名，无需再次查找
+        new_ids = {row["coin_id"] for row in new_rows}
+        ranks = {}
+        for position, row in enumerate(day_rows, start=1):
+            row["rank"] = position
+            if row["coin_id"] in new_ids:
+                ranks[row["coin_id"]] = position
+
+        # 确认需要写入后再备份现有文件
+        if backup and filepath.exists():
+            _backup_file(filepath, ts_suffix)
+
+        # 保存文件（与每日聚合器一致，不截断小数位，避免低价币价格被写成0）；
+        # 先写临时文件再原子替换，写入失败时原文件保持不变
+        tmp_path = _tmp_path(filepath)
+        with open(tmp_path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(
+                f, fieldnames=fieldnames, extrasaction="ignore", lineterminator="\n"
+            )
+            writer.writeheader()
+            writer.writerows(day_rows)
+        os.replace(tmp_path, filepath)
+
+        return True, "", ranks
+
+    except Exception as e:
+        # 原文件未被改动，只需清理未完成的临时文件
+        _tmp_path(filepath).unlink(missing_ok=True)
+        return False, str(e), {}
+
+
+def _read_coin_csv_arrow(csv_path: Path) -> pd.DataFrame:
+    """使用 pyarrow 多线程解析币种CSV，列类型与 COIN_FILE_DTYPES 一致
+
+    Args:
+        csv_path: 币种CSV文件路径
+
+    Returns:
+        只包含 COIN_FILE_DTYPES 中列的DataFrame
+    """
+    table = pacsv.read_csv(
+        csv_path,
+        convert_options=pacsv.ConvertOptions(
+            column_types={
+                "timestamp": pa.int64(),
+                "price": pa.float64(),
+                "volume": pa.float64(),
+                "market_cap": pa.float64(),
+            }
+        ),
+    )
+    table = table.select(
+        [name for name in table.column_names if name in COIN_FILE_DTYPES]
+    )
+    return table.to_pandas(self_destruct=True)
+
+
+def _load_coin_file(csv_path: Path, coin_id: str) -> Optional[pd.DataFrame]:
+    """加载币种数据文件（不依赖实例，可在子进程中执行）
+
+    Args:
+        csv_path: 币种数据文件路径
+        coin_id: 币种ID
+
+    Returns:
+        币种数据DataFrame，失败则返回None
+    """
+    if not csv_path.exists():
+        logger.debug(f"币种数据文件不存在: {csv_path}")
+        return None
+
+    try:
+        # 只读取需要的列并固定类型，跳过类型推断
+        if pa is not None:
+            df = _read_coin_csv_arrow(csv_path)
+        else:
+            df = pd.read_csv(
+                csv_path,
+                usecols=lambda col: col in COIN_FILE_DTYPES,
+                dtype=COIN_FILE_DTYPES,
+                engine="c",
+            )
+
+        # 数据验证
+        required_columns = ["timestamp", "price", "market_cap"]
+        missing_columns = [col for col in required_columns if col not in df.columns]
+        if missing_columns:
+            logger.error(f"{coin_id} 数据缺少必要列: {missing_columns}")
+            return None
+
+        # 转换日期：毫秒时间戳整除一天得到 datetime64[D]，避免生成 Python date 对象
+        df["date"] = (df["timestamp"].to_numpy(dtype="int64") // 86_400_000).astype(
+            "datetime64[D]"
+        )
+        df["coin_id"] = pd.Categorical.from_codes(
+            np.zeros(len(df), dtype=np.int8), categories=[coin_id]
+        )
+
+        # 数据清洗：一次组合掩码移除无效记录（NaN 与任何数比较均为 False）
+        original_len = len(df)
+        price = df["price"].to_numpy(dtype=np.float64)
+        market_cap = df["market_cap"].to_numpy(dtype=np.float64)
+        df = df[(price > 0) & (market_cap > 0)]
+
+        if len(df) < original_len:
+            logger.warning(f"{coin_id} 清理了 {original_len - len(df)} 条无效记录")
+
+        logger.debug(f"成功加载 {coin_id} 数据: {len(df)} 条记录")
+        return df
+
+    except Exception as e:
+        logger.error(f"加载 {coin_id} 数据失败: {e}")
+        return None
+
+
+def _collect_rows_from_file(
+    csv_path: Path, coin_id: str, existing_dates: Set[date]
+) -> Optional[Dict[date, Dict]]:
+    """读取一次币种数据，生成与已有每日文件重叠日期的待插入记录（可在子进程中执行）
+
+    Args:
+        csv_path: 币种数据文件路径
+        coin_id: 币种ID
+        existing_dates: 已有的每日文件日期集合
+
+    Returns:
+        日期到数据记录的字典，加载失败返回None
+    """
+    coin_df = _load_coin_file(csv_path, coin_id)
+    if coin_df is None:
+        logger.error(f"无法加载 {coin_id} 数据")
+        return None
+
+    # 取每天的最新记录（防止同日多条记录），_load_coin_file 已过滤无效数据；
+    # 一次去重代替逐日期筛选，文件未按时间排序时先稳定排序保证“最新”
+    if not coin_df["timestamp"].is_monotonic_increasing:
+        coin_df = coin_df.sort_values("timestamp", kind="stable")
+    coin_df = coin_df.drop_duplicates("date", keep="last")
+    day_dates = pd.DatetimeIndex(coin_df["date"]).date
+
+    # tolist() 在 C 层一次性转换为 Python int/float，循环体内无需逐个 int()/float()
+    coin_rows = {}
+    for target_date, timestamp, price, volume, market_cap in zip(
+        day_dates,
+        coin_df["timestamp"].tolist(),
+        coin_df["price"].tolist(),
+        coin_df["volume"].fillna(0.0).tolist(),
+        coin_df["market_cap"].tolist(),
+    ):
+        if target_date not in existing_dates:
+            continue
+        coin_rows[target_date] = {
+            "timestamp": timestamp,
+            "price": price,
+            "volume": volume,
+            "market_cap": market_cap,
+            "date": target_date,
+            "coin_id": coin_id,
+        }
+    return coin_rows
+
+
+def _write_days(
+    tasks: List[Tuple[Path, List[Dict], bool, Optional[str]]],
+) -> List[Tuple[bool, str, Dict[str, int]]]:
+    """在一个子进程任务中依次写入多个每日文件，摊薄进程间通信开销
+
+    Args:
+        tasks: (文件路径, 记录列表, 是否备份, 时间戳后缀) 元组列表
+
+    Returns:
+        与 tasks 顺序一致的 _write_day 结果列表
+    """
+    return [_write_day(*task) for task in tasks]
+
 
 class IncrementalDailyUpdater:
     """增量每日数据更新器"""
@@ -32,6 +366,7 @@ class IncrementalDailyUpdater:
         coins_dir: str = "data/coins",
         daily_dir: str = "data/daily/daily_files",
         backup_enabled: bool = False,  # 默认禁用备份，避免产生大量文件
+        market_cache_ttl: float = 0,  # 市值排名缓存有效期（秒），0 表示不缓存
     ):
         """
         初始化增量更新器
@@ -39,6 +374,7 @@ class IncrementalDailyUpdater:
         self.coins_dir = Path(coins_dir)
         self.daily_dir = Path(daily_dir)
         self.backup_enabled = backup_enabled
+        self.market_cache_ttl = market_cache_ttl
 
         # 初始化依赖组件
         self.downloader = create_batch_downloader()
@@ -48,27 +384,94 @@ class IncrementalDailyUpdater:
         # 确保目录存在
         self.daily_dir.mkdir(parents=True, exist_ok=True)
 
+        # 已有每日文件日期的缓存（写入新日期文件时增量加入）
+        self._existing_dates_cache: Optional[Set[date]] = None
+
+        # 市值排名缓存文件所在目录（每日文件目录的上一级，与 Parquet 缓存并列）
+        self.market_cache_dir = self.daily_dir.parent
+
         # 操作日志文件
         self.operation_log = Path("logs/incremental_daily_operations.jsonl")
         self.operation_log.parent.mkdir(exist_ok=True)
+        # 长期持有的缓冲句柄，避免每条日志都打开/关闭文件
+        self._log_fh = open(self.operation_log, "ab", buffering=1 << 16)
+        # 下载阶段的工作线程会并发写日志
+        self._log_lock = threading.Lock()
 
         logger.info("增量更新器初始化完成")
 
     def get_existing_coins(self) -> Set[str]:
         """获取已有的币种列表"""
-        existing = set()
-        for csv_file in self.coins_dir.glob("*.csv"):
-            existing.add(csv_file.stem)
+        if not self.coins_dir.exists():
+            logger.debug(f"币种数据目录不存在: {self.coins_dir}")
+            return set()
+
+        # os.scandir 的目录项自带类型信息，无需为每个文件构建 Path 对象
+        with os.scandir(self.coins_dir) as entries:
+            existing = {
+                entry.name[:-4]
+                for entry in entries
+                if entry.name.endswith(".csv") and entry.is_file()
+            }
         logger.debug(f"发现 {len(existing)} 个已有币种")
         return existing
 
+    def _market_cache_path(self, top_n: int) -> Path:
+        """市值排名缓存文件路径（按 top_n 区分）"""
+        return self.market_cache_dir / f".market_coins_top{top_n}.json"
+
+    def _load_market_cache(self, top_n: int) -> Optional[Set[str]]:
+        """读取未过期的市值排名缓存
+
+        Args:
+            top_n: 市值排名范围
+
+        Returns:
+            币种ID集合，缓存未启用、不存在或已过期时返回None
+        """
+        if self.market_cache_ttl <= 0:
+            return None
+
+        cache_path = self._market_cache_path(top_n)
+        try:
+            age = time.time() - cache_path.stat().st_mtime
+            if age > self.market_cache_ttl:
+                return None
+            with open(cache_path, "r", encoding="utf-8") as f:
+                coin_ids = set(json.load(f)["coin_ids"])
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"读取市值排名缓存失败: {e}")
+            return None
+
+        logger.info(f"使用 {age:.0f} 秒前缓存的市值排名 ({len(coin_ids)} 个币种)")
+        return coin_ids
+
+    def _save_market_cache(self, top_n: int, coin_ids: Set[str]) -> None:
+        """保存市值排名缓存（未启用缓存时跳过）"""
+        if self.market_cache_ttl <= 0:
+            return
+
+        try:
+            with open(self._market_cache_path(top_n), "w", encoding="utf-8") as f:
+                json.dump({"fetched_at": time.time(), "coin_ids": sorted(coin_ids)}, f)
+        except Exception as e:
+            logger.warning(f"保存市值排名缓存失败: {e}")
+
     def get_current_market_coins(self, top_n: int = 1000) -> Set[str]:
-        """获取当前市值前N名币种"""
+        """获取当前市值前N名币种（启用缓存时，有效期内直接使用缓存结果）"""
+        cached = self._load_market_cache(top_n)
+        if cached is not None:
+            return cached
+
         logger.info(f"获取当前市值前 {top_n} 名币种...")
         try:
             market_data = self.market_fetcher.get_top_coins(top_n)
             coin_ids = {coin["id"] for coin in market_data}
             logger.info(f"成功获取 {len(coin_ids)} 个市值排名币种")
+            if coin_ids:
+                self._save_market_cache(top_n, coin_ids)
             return coin_ids
         except Exception as e:
             logger.error(f"获取市值排名失败: {e}")
@@ -142,66 +545,86 @@ class IncrementalDailyUpdater:
         Returns:
             币种数据DataFrame，失败则返回None
         """
-        csv_path = self.coins_dir / f"{coin_id}.csv"
-        if not csv_path.exists():
-            logger.debug(f"币种数据文件不存在: {csv_path}")
+        df = _load_coin_file(self.coins_dir / f"{coin_id}.csv", coin_id)
+        if df is None:
             return None
 
-        try:
-            df = pd.read_csv(csv_path)
-
-            # 数据验证
-            required_columns = ["timestamp", "price", "market_cap"]
-            missing_columns = [col for col in required_columns if col not in df.columns]
-            if missing_columns:
-                logger.error(f"{coin_id} 数据缺少必要列: {missing_columns}")
-                return None
-
-            # 转换日期
-            df["date"] = pd.to_datetime(df["timestamp"], unit="ms").dt.date
-            df["coin_id"] = coin_id
-
-            # 数据清洗：移除无效记录
-            original_len = len(df)
-            df = df.dropna(subset=["price", "market_cap"])
-            df = df[(df["price"] > 0) & (df["market_cap"] > 0)]
-
-            if len(df) < original_len:
-                logger.warning(f"{coin_id} 清理了 {original_len - len(df)} 条无效记录")
-
-            logger.debug(f"成功加载 {coin_id} 数据: {len(df)} 条记录")
-            return df
-
-        except Exception as e:
-            logger.error(f"加载 {coin_id} 数据失败: {e}")
-            return None
+        # 内部快速路径使用 datetime64[D] 日期和 Categorical 币种ID，
+        # 对外保持原有类型：date 为 datetime.date 对象，coin_id 为字符串
+        df["date"] = pd.DatetimeIndex(df["date"]).date
+        df["coin_id"] = coin_id
+        return df
 
     def get_existing_daily_dates(self) -> Set[date]:
         """获取已有的每日数据文件日期"""
         dates = set()
 
         # 扫描分层结构: YYYY/MM/YYYY-MM-DD.csv
-        for year_dir in self.daily_dir.iterdir():
-            if year_dir.is_dir() and year_dir.name.isdigit():
-                for month_dir in year_dir.iterdir():
-                    if month_dir.is_dir() and month_dir.name.isdigit():
-                        for csv_file in month_dir.glob("*.csv"):
-                            try:
-                                file_date = datetime.strptime(
-                                    csv_file.stem, "%Y-%m-%d"
-                                ).date()
-                                dates.add(file_date)
-                            except ValueError:
-                                continue
+        # 使用 os.scandir 直接读取目录项类型，避免为每个路径额外 stat
+        with os.scandir(self.daily_dir) as year_entries:
+            for year_entry in year_entries:
+                if not (
+                    year_entry.name.isdigit()
+                    and year_entry.is_dir(follow_symlinks=False)
+                ):
+                    continue
+                with os.scandir(year_entry.path) as month_entries:
+                    for month_entry in month_entries:
+                        if not (
+                            month_entry.name.isdigit()
+                            and month_entry.is_dir(follow_symlinks=False)
+                        ):
+                            continue
+                        with os.scandir(month_entry.path) as file_entries:
+                            for file_entry in file_entries:
+                                name = file_entry.name
+                                # 文件名固定为 YYYY-MM-DD.csv，直接按位置切片解析
+                                if len(name) != 14 or not name.endswith(".csv"):
+                                    continue
+                                try:
+                                    dates.add(
+                                        date(
+                                            int(name[0:4]),
+                                            int(name[5:7]),
+                                            int(name[8:10]),
+                                        )
+                                    )
+                                except ValueError:
+                                    continue
 
         logger.debug(f"发现 {len(dates)} 个已有每日数据文件")
         return dates
 
-    def _backup_daily_file(self, filepath: Path) -> Optional[Path]:
+    def _get_existing_daily_dates_cached(self) -> Set[date]:
+        """获取已有的每日数据文件日期（首次调用时扫描目录，之后复用结果）"""
+        if self._existing_dates_cache is None:
+            self._existing_dates_cache = self.get_existing_daily_dates()
+        return self._existing_dates_cache
+
+    def _daily_path(self, target_date: date) -> Path:
+        """获取指定日期的每日数据文件路径（YYYY/MM/YYYY-MM-DD.csv）
+
+        Args:
+            target_date: 目标日期
+
+        Returns:
+            每日数据文件路径
+        """
+        return (
+            self.daily_dir
+            / str(target_date.year)
+            / f"{target_date.month:02d}"
+            / f"{target_date}.csv"
+        )
+
+    def _backup_daily_file(
+        self, filepath: Path, ts_suffix: Optional[str] = None
+    ) -> Optional[Path]:
         """备份每日数据文件（智能备份）
 
         Args:
             filepath: 要备份的文件路径
+            ts_suffix: 备份文件名的时间戳后缀，None表示使用当前时间
 
         Returns:
             备份文件路径，失败则返回None
@@ -209,39 +632,7 @@ class IncrementalDailyUpdater:
         if not self.backup_enabled or not filepath.exists():
             return None
 
-        try:
-            # 创建备份目录
-            backup_dir = filepath.parent / ".backup"
-            backup_dir.mkdir(exist_ok=True)
-
-            # 智能备份：只保留最新的3个备份
-            existing_backups = sorted(
-                backup_dir.glob(f"{filepath.stem}_*.csv"),
-                key=lambda x: x.stat().st_mtime,
-                reverse=True,
-            )
-
-            # 删除超过3个的旧备份
-            for old_backup in existing_backups[2:]:  # 保留最新2个，第3个开始删除
-                try:
-                    old_backup.unlink()
-                    logger.debug(f"删除旧备份: {old_backup}")
-                except Exception as e:
-                    logger.warning(f"删除旧备份失败: {e}")
-
-            # 生成备份文件名（包含时间戳）
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            backup_filename = f"{filepath.stem}_{timestamp}.csv"
-            backup_path = backup_dir / backup_filename
-
-            # 复制文件
-            shutil.copy2(filepath, backup_path)
-            logger.debug(f"已备份文件: {backup_path}")
-            return backup_path
-
-        except Exception as e:
-            logger.warning(f"备份文件失败 {filepath}: {e}")
-            return None
+        return _backup_file(filepath, ts_suffix)
 
     def insert_coin_into_daily_file(
         self, target_date: date, coin_data: Dict, pbar: Optional[tqdm] = None
@@ -256,167 +647,270 @@ class IncrementalDailyUpdater:
         Returns:
             是否插入成功
         """
-        try:
-            # 构造文件路径
-            year_dir = self.daily_dir / str(target_date.year)
-            month_dir = year_dir / f"{target_date.month:02d}"
-            filepath = month_dir / f"{target_date}.csv"
-
-            # 确保目录存在
-            month_dir.mkdir(parents=True, exist_ok=True)
+        return self.insert_coins_into_daily_file(target_date, [coin_data], pbar) == 1
 
-            # 备份现有文件
-            backup_path = self._backup_daily_file(filepath)
+    def insert_coins_into_daily_file(
+        self,
+        target_date: date,
+        rows: List[Dict],
+        pbar: Optional[tqdm] = None,
+        ts_suffix: Optional[str] = None,
+    ) -> int:
+        """将同一日期的多个币种数据一次性插入到每日文件中
 
-            try:
-                if filepath.exists():
-                    # 读取现有文件
-                    df = pd.read_csv(filepath)
-
-                    # 检查币种是否已存在
-                    if coin_data["coin_id"] in df["coin_id"].values:
-                        logger.debug(
-                            f"{coin_data['coin_id']} 在 {target_date} 已存在，跳过"
-                        )
-                        return True
+        只读写一次文件、只排序一次，已存在的币种会被跳过。
 
-                    # 添加新币种数据
-                    new_row = pd.DataFrame([coin_data])
-                    df = pd.concat([df, new_row], ignore_index=True)
+        Args:
+            target_date: 目标日期
+            rows: 币种数据字典列表（同一日期）
+            pbar: tqdm 进度条实例 (可选)
+            ts_suffix: 备份文件名的时间戳后缀，None表示使用当前时间
 
-                else:
-                    # 创建新文件
-                    df = pd.DataFrame([coin_data])
+        Returns:
+            成功处理的币种数量（包括已存在而跳过的币种），失败返回0
+        """
+        if not rows:
+            return 0
 
-                # 重新排序并更新排名
-                df = df.sort_values("market_cap", ascending=False).reset_index(
-                    drop=True
-                )
-                df["rank"] = range(1, len(df) + 1)
+        success, error, ranks = _write_day(
+            self._daily_path(target_date), rows, self.backup_enabled, ts_suffix
+        )
+        return self._record_day_result(target_date, rows, success, error, ranks, pbar)
 
-                # 保存文件
-                df.to_csv(filepath, index=False, float_format="%.6f")
+    def _record_day_result(
+        self,
+        target_date: date,
+        rows: List[Dict],
+        success: bool,
+        error: str,
+        ranks: Dict[str, int],
+        pbar: Optional[tqdm] = None,
+    ) -> int:
+        """记录单个每日文件的写入结果
 
-                # 更新日志，但不使用 f-string 以提高性能
-                if pbar:
-                    pbar.set_description(
-                        f"已集成 {coin_data['coin_id']} 到 {target_date}"
-                    )
-                else:
-                    logger.info(
-                        f"已将 {coin_data['coin_id']} 插入到 {target_date} (排名: {df[df['coin_id'] == coin_data['coin_id']]['rank'].iloc[0]})"
-                    )
+        Args:
+            target_date: 目标日期
+            rows: 本次写入的币种数据字典列表
+            success: 是否写入成功
+            error: 错误信息
+            ranks: 新插入币种到排名的字典
+            pbar: tqdm 进度条实例 (可选)
 
-                # 记录操作日志
+        Returns:
+            成功处理的币种数量（包括已存在而跳过的币种），失败返回0
+        """
+        if not success:
+            for row in rows:
+                error_msg = f"插入 {row['coin_id']} 到 {target_date} 失败: {error}"
+                logger.error(error_msg)
                 self._log_operation(
                     "insert",
-                    coin_data["coin_id"],
-                    success=True,
+                    row["coin_id"],
+                    success=False,
+                    error=error,
                     target_date=str(target_date),
-                    rank=int(df[df["coin_id"] == coin_data["coin_id"]]["rank"].iloc[0]),
                 )
+            return 0
 
-                return True
+        # 写入成功后文件必然存在：直接加入日期缓存，而不是让缓存失效重新扫描
+        if self._existing_dates_cache is not None:
+            self._existing_dates_cache.add(target_date)
 
-            except Exception as e:
-                # 如果有备份，尝试恢复
-                if backup_path and backup_path.exists():
-                    try:
-                        shutil.copy2(backup_path, filepath)
-                        logger.warning(f"操作失败，已从备份恢复: {filepath}")
-                    except Exception as restore_error:
-                        logger.error(f"恢复备份失败: {restore_error}")
+        for row in rows:
+            coin_id = row["coin_id"]
+            if coin_id not in ranks:
+                logger.debug(f"{coin_id} 在 {target_date} 已存在，跳过")
+                continue
 
-                raise e
+            # 更新日志，但不使用 f-string 以提高性能
+            if pbar:
+                pbar.set_description(f"已集成 {coin_id} 到 {target_date}")
+            else:
+                logger.info(
+                    f"已将 {coin_id} 插入到 {target_date} (排名: {ranks[coin_id]})"
+                )
 
-        except Exception as e:
-            error_msg = f"插入 {coin_data['coin_id']} 到 {target_date} 失败: {e}"
-            logger.error(error_msg)
+            # 记录操作日志
             self._log_operation(
                 "insert",
-                coin_data["coin_id"],
-                success=False,
-                error=str(e),
+                coin_id,
+                success=True,
                 target_date=str(target_date),
+                rank=ranks[coin_id],
             )
-            return False
 
-    def integrate_new_coin_into_daily_files(self, coin_id: str) -> Tuple[int, int]:
-        """将新币种数据集成到所有相关的每日文件中
+        return len(rows)
+
+    def _collect_coin_rows(
+        self, coin_id: str, existing_dates: Set[date]
+    ) -> Optional[Dict[date, Dict]]:
+        """读取一次币种数据，生成与已有每日文件重叠日期的待插入记录
 
         Args:
             coin_id: 币种ID
+            existing_dates: 已有的每日文件日期集合
 
         Returns:
-            (成功插入天数, 总尝试天数)
+            日期到数据记录的字典，加载失败返回None
         """
-        # logger.info(f"开始集成 {coin_id} 到每日文件") # 在并行模式下过于嘈杂
+        return _collect_rows_from_file(
+            self.coins_dir / f"{coin_id}.csv", coin_id, existing_dates
+        )
 
-        # 加载币种数据
-        coin_df = self.load_coin_data(coin_id)
-        if coin_df is None:
-            logger.error(f"无法加载 {coin_id} 数据")
-            return 0, 0
+    def collect_rows_for_coins(
+        self,
+        coin_ids: List[str],
+        existing_dates: Set[date],
+        max_workers: Optional[int] = None,
+    ) -> Dict[str, Dict[date, Dict]]:
+        """并行读取多个币种的数据并生成待插入记录
 
-        # 获取已有的每日文件日期
-        existing_dates = self.get_existing_daily_dates()
+        CSV解析后的筛选、去重和记录构建受 GIL 限制，多个币种时使用进程池。
 
-        # 找到币种数据与已有日期的交集
-        coin_dates = set(coin_df["date"].unique())
-        relevant_dates = existing_dates.intersection(coin_dates)
+        Args:
+            coin_ids: 币种ID列表
+            existing_dates: 已有的每日文件日期集合
+            max_workers: 工作进程数，None表示CPU核心数减一
 
-        total_attempts = len(relevant_dates)
-        if total_attempts == 0:
-            # logger.warning(f"{coin_id} 数据与现有每日文件无交集") # 在并行模式下过于嘈杂
-            return 0, 0
+        Returns:
+            币种ID到（日期到数据记录的字典）的映射，加载失败的币种为空字典
+        """
+        coin_rows: Dict[str, Dict[date, Dict]] = {}
+        if len(coin_ids) <= 1:
+            for coin_id in coin_ids:
+                coin_rows[coin_id] = (
+                    self._collect_coin_rows(coin_id, existing_dates) or {}
+                )
+            return coin_rows
+
+        if max_workers is None:
+            max_workers = max(1, multiprocessing.cpu_count() - 1)
+
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            future_to_coin = {
+                executor.submit(
+                    _collect_rows_from_file,
+                    self.coins_dir / f"{coin_id}.csv",
+                    coin_id,
+                    existing_dates,
+                ): coin_id
+                for coin_id in coin_ids
+            }
+            for future in tqdm(
+                as_completed(future_to_coin),
+                total=len(future_to_coin),
+                desc="加载新币种数据",
+            ):
+                coin_id = future_to_coin[future]
+                try:
+                    coin_rows[coin_id] = future.result() or {}
+                except Exception as e:
+                    logger.error(f"加载 {coin_id} 数据失败: {e}")
+                    coin_rows[coin_id] = {}
 
-        # logger.info(
-        #     f"{coin_id} 有 {len(coin_dates)} 天数据，其中 {total_attempts} 天与已有文件重叠"
-        # )
+        return coin_rows
 
-        # 逐日插入
-        successful_insertions = 0
+    def integrate_batch_by_date(
+        self,
+        by_date: Dict[date, List[Dict]],
+        max_workers: Optional[int] = None,
+        ts_suffix: Optional[str] = None,
+    ) -> Dict[date, bool]:
+        """按日期批量集成：每个每日文件只读写一次
 
-        for target_date in sorted(relevant_dates):
-            # 获取该日期的币种数据
-            day_data = coin_df[coin_df["date"] == target_date]
-            if day_data.empty:
-                continue
+        解析、排序和写回CSV是CPU密集型操作，不同日期的文件相互独立，
+        使用进程池并行写入。启用备份时，由工作进程在确认需要写入后先备份再写入；
+        写入通过临时文件原子替换，失败时原文件保持不变。日志记录和结果统计在主进程完成。
 
-            # 取最新记录（防止同日多条记录）
-            latest_record = day_data.iloc[-1]
+        Args:
+            by_date: 日期到待插入记录列表的字典
+            max_workers: 并行写入的工作进程数，None表示CPU核心数减一
+            ts_suffix: 本批次备份文件名共用的时间戳后缀
 
-            # 检查数据有效性
-            if (
-                pd.isna(latest_record["price"])
-                or latest_record["price"] <= 0
-                or pd.isna(latest_record["market_cap"])
-                or latest_record["market_cap"] <= 0
-            ):
-                logger.debug(f"{coin_id} 在 {target_date} 的数据无效，跳过")
-                continue
+        Returns:
+            日期到是否写入成功的字典
+        """
+        date_results = {}
+        if not by_date:
+            return date_results
+
+        if len(by_date) == 1:
+            # 只有一个文件时直接在当前进程写入
+            for target_date, rows in by_date.items():
+                date_results[target_date] = self.insert_coins_into_daily_file(
+                    target_date, rows, ts_suffix=ts_suffix
+                ) == len(rows)
+            return date_results
+
+        if max_workers is None:
+            max_workers = max(1, multiprocessing.cpu_count() - 1)
+
+        # 单个文件写入只需几毫秒，按块提交任务，避免逐日期的进程间通信开销
+        target_dates = list(by_date)
+        chunk_size = max(1, math.ceil(len(target_dates) / (max_workers * 4)))
+
+        with tqdm(total=len(by_date), desc="写入每日文件", unit="天") as pbar:
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                future_to_dates = {}
+                for start in range(0, len(target_dates), chunk_size):
+                    chunk_dates = target_dates[start : start + chunk_size]
+                    tasks = [
+                        (
+                            self._daily_path(target_date),
+                            by_date[target_date],
+                            self.backup_enabled,
+                            ts_suffix,
+                        )
+                        for target_date in chunk_dates
+                    ]
+                    future_to_dates[executor.submit(_write_days, tasks)] = chunk_dates
 
-            # 构造数据记录
-            coin_data = {
-                "timestamp": int(latest_record["timestamp"]),
-                "price": float(latest_record["price"]),
-                "volume": (
-                    float(latest_record["volume"])
-                    if pd.notna(latest_record["volume"])
-                    else 0.0
-                ),
-                "market_cap": float(latest_record["market_cap"]),
-                "date": target_date,
-                "coin_id": coin_id,
-            }
+                for future in as_completed(future_to_dates):
+                    chunk_dates = future_to_dates[future]
+                    try:
+                        chunk_results = future.result()
+                    except Exception as e:
+                        chunk_results = [(False, str(e), {})] * len(chunk_dates)
+
+                    for target_date, (success, error, ranks) in zip(
+                        chunk_dates, chunk_results
+                    ):
+                        rows = by_date[target_date]
+                        handled = self._record_day_result(
+                            target_date,
+                            rows,
+                            success,
+                            error,
+                            ranks,
+                            pbar,
+                        )
+                        date_results[target_date] = handled == len(rows)
+                        pbar.update(1)
 
-            # 插入到每日文件
-            if self.insert_coin_into_daily_file(target_date, coin_data):
-                successful_insertions += 1
+        return date_results
 
-        success_rate = (
-            (successful_insertions / total_attempts * 100) if total_attempts > 0 else 0
+    def integrate_new_coin_into_daily_files(self, coin_id: str) -> Tuple[int, int]:
+        """将新币种数据集成到所有相关的每日文件中
+
+        Args:
+            coin_id: 币种ID
+
+        Returns:
+            (成功插入天数, 总尝试天数)
+        """
+        coin_rows = self._collect_coin_rows(
+            coin_id, self._get_existing_daily_dates_cached()
         )
+        if not coin_rows:
+            return 0, 0
+
+        total_attempts = len(coin_rows)
+        date_results = self.integrate_batch_by_date(
+            {target_date: [row] for target_date, row in coin_rows.items()}
+        )
+        successful_insertions = sum(date_results.values())
+
+        success_rate = successful_insertions / total_attempts * 100
         logger.info(
             f"{coin_id} 集成完成: {successful_insertions}/{total_attempts} 天成功 ({success_rate:.1f}%)"
         )
@@ -434,21 +928,41 @@ class IncrementalDailyUpdater:
         """
         try:
             log_entry = {
-                "timestamp": datetime.now().isoformat(),
+                "timestamp": datetime.now(),
                 "operation": operation,
                 "coin_id": coin_id,
                 "success": success,
                 **kwargs,
             }
 
-            with open(self.operation_log, "a", encoding="utf-8") as f:
-                f.write(json.dumps(log_entry) + "\n")
+            if orjson is not None:
+                line = orjson.dumps(log_entry) + b"\n"
+            else:
+                log_entry["timestamp"] = log_entry["timestamp"].isoformat()
+                line = (json.dumps(log_entry) + "\n").encode("utf-8")
+            with self._log_lock:
+                self._log_fh.write(line)
 
         except Exception as e:
             logger.warning(f"记录操作日志失败: {e}")
 
+    def close(self):
+        """写出缓冲的操作日志并关闭日志文件"""
+        with self._log_lock:
+            if not self._log_fh.closed:
+                self._log_fh.flush()
+                self._log_fh.close()
+
+    def __del__(self):
+        if hasattr(self, "_log_lock"):
+            self.close()
+
     def update_with_new_coins(
-        self, top_n: int = 1000, max_workers: int = 3, dry_run: bool = False
+        self,
+        top_n: int = 1000,
+        max_workers: int = 3,
+        dry_run: bool = False,
+        full_resort: bool = False,
     ) -> Dict:
         """检测并集成新币种的完整流程
 
@@ -456,11 +970,17 @@ class IncrementalDailyUpdater:
             top_n: 监控的市值排名范围
             max_workers: 并行下载的工作线程数
             dry_run: 是否为试运行模式（不实际修改文件）
+            full_resort: 是否在集成后对所有每日文件做一致性重排序
+                （写入时已排序，默认跳过）
 
         Returns:
             操作结果字典
         """
         start_time = datetime.now()
+        # 每次更新重新扫描每日文件目录，之后整个流程复用同一结果
+        self._existing_dates_cache = None
+        # 本次更新产生的所有备份共用一个时间戳后缀
+        batch_ts = start_time.strftime("%Y%m%d_%H%M%S")
         logger.info("=" * 60)
         logger.info("开始增量每日数据更新")
         logger.info(f"监控范围: 前 {top_n} 名")
@@ -531,41 +1051,42 @@ class IncrementalDailyUpdater:
                 if res["success"]
             ]
 
-            with tqdm(total=len(successful_coins), desc="集成新币种") as pbar:
-                with ThreadPoolExecutor(max_workers=max_workers) as executor:
-                    future_to_coin = {
-                        executor.submit(
-                            self.integrate_new_coin_into_daily_files, coin
-                        ): coin
-                        for coin in successful_coins
-                    }
-
-                    for future in as_completed(future_to_coin):
-                        coin = future_to_coin[future]
-                        pbar.set_description(f"集成 {coin}")
-                        try:
-                            inserted_count, total_attempts = future.result()
-                            results["integration_results"][coin] = {
-                                "success": inserted_count > 0,
-                                "inserted_days": inserted_count,
-                                "total_attempts": total_attempts,
-                                "success_rate": (
-                                    (inserted_count / total_attempts * 100)
-                                    if total_attempts > 0
-                                    else 0
-                                ),
-                                "error": None,
-                            }
-                        except Exception as e:
-                            logger.error(f"集成 {coin} 时出错: {e}")
-                            results["integration_results"][coin] = {
-                                "success": False,
-                                "inserted_days": 0,
-                                "total_attempts": 0,
-                                "success_rate": 0,
-                                "error": str(e),
-                            }
-                        pbar.update(1)
+            # 每个币种只读取一次数据，按日期归并后每个每日文件只写一次
+            existing_dates = self._get_existing_daily_dates_cached()
+            by_date: Dict[date, List[Dict]] = defaultdict(list)
+            coin_attempts: Dict[str, int] = {}
+
+            rows_by_coin = self.collect_rows_for_coins(successful_coins, existing_dates)
+            for coin in successful_coins:
+                coin_rows = rows_by_coin[coin]
+                coin_attempts[coin] = len(coin_rows)
+                for target_date, row in coin_rows.items():
+                    by_date[target_date].append(row)
+
+            date_results = self.integrate_batch_by_date(by_date, ts_suffix=batch_ts)
+
+            coin_inserted: Dict[str, Set[date]] = defaultdict(set)
+            for target_date, written in date_results.items():
+                if written:
+                    for row in by_date[target_date]:
+                        coin_inserted[row["coin_id"]].add(target_date)
+
+            for coin in successful_coins:
+                inserted_dates = coin_inserted[coin]
+                inserted_count = len(inserted_dates)
+                total_attempts = coin_attempts[coin]
+                results["integration_results"][coin] = {
+                    "success": inserted_count > 0,
+                    "inserted_days": inserted_count,
+                    "inserted_dates": sorted(d.isoformat() for d in inserted_dates),
+                    "total_attempts": total_attempts,
+                    "success_rate": (
+                        (inserted_count / total_attempts * 100)
+                        if total_attempts > 0
+                        else 0
+                    ),
+                    "error": None,
+                }
 
             # 标记下载失败的币种
             for coin in new_coins:
@@ -573,11 +1094,15 @@ class IncrementalDailyUpdater:
                     results["integration_results"][coin] = {
                         "success": False,
                         "inserted_days": 0,
+                        "inserted_dates": [],
                         "total_attempts": 0,
                         "success_rate": 0,
                         "error": "下载失败，跳过集成",
                     }
 
+            # 集成完成后写出缓冲的操作日志
+            self._log_fh.flush()
+
             # 4. 生成总结报告
             end_time = datetime.now()
             duration = (end_time - start_time).total_seconds()
@@ -611,20 +1136,37 @@ class IncrementalDailyUpdater:
             logger.warning("用户中断了增量更新操作")
             results["summary"]["status"] = "interrupted"
             results["summary"]["error"] = "User interrupted the process"
+            self._log_fh.flush()
             return results
         except Exception as e:
             logger.error(f"增量更新过程中发生错误: {e}")
             results["summary"]["status"] = "error"
             results["summary"]["error"] = str(e)
+            self._log_fh.flush()
             return results
 
-        # 自动重排序
+        # 写入每日文件时已按市值排序并分配排名，无需再次重排序；
+        # 需要全局一致性检查时才对所有每日文件重排序
+        if full_resort:
+            self.resort_all_daily_files(results, batch_ts)
+
+        return results
+
+    def resort_all_daily_files(
+        self, results: Dict, ts_suffix: Optional[str] = None
+    ) -> None:
+        """对所有每日文件按市值重新排序（全局一致性检查）
+
+        Args:
+            results: 操作结果字典，错误信息写入其 summary
+            ts_suffix: 备份文件名共用的时间戳后缀
+        """
         try:
-            logger.info("尝试对每日文件进行自动重排序...")
-            # 获取所有每日文件
-            daily_files = [
+            logger.info("对所有每日文件进行重排序...")
+            # 与每日文件同名于其月份目录的文件不是每日数据文件，不参与重排序
+            daily_files = sorted(
                 f for f in self.daily_dir.glob("*/*/*.csv") if f.stem != f.parent.name
-            ]
+            )
 
             if not daily_files:
                 logger.info("没有找到需要重排序的每日文件。")
@@ -633,16 +1175,17 @@ class IncrementalDailyUpdater:
 
             for target_file in tqdm(daily_files, desc="重排序每日文件"):
                 try:
-                    # 备份现有文件
-                    self._backup_daily_file(target_file)
+                    # 备份现有文件（未启用备份时直接跳过）
+                    if self.backup_enabled:
+                        self._backup_daily_file(target_file, ts_suffix)
 
                     # 执行排序
-                    df = pd.read_csv(target_file)
-                    df = df.sort_values("market_cap", ascending=False).reset_index(
-                        drop=True
+                    df = rank_by_market_cap(
+                        pd.read_csv(target_file, dtype=DAILY_FILE_DTYPES)
                     )
-                    df["rank"] = range(1, len(df) + 1)
-                    df.to_csv(target_file, index=False, float_format="%.6f")
+                    tmp_path = _tmp_path(target_file)
+                    df.to_csv(tmp_path, index=False)
+                    os.replace(tmp_path, target_file)
 
                     logger.debug(f"已对 {target_file} 进行重排序")
                 except Exception as sort_e:
@@ -654,20 +1197,19 @@ class IncrementalDailyUpdater:
                         f"File: {target_file}, Error: {str(sort_e)}"
                     )
 
-            logger.info("自动重排序完成。")
+            logger.info("重排序完成。")
 
         except Exception as e:
-            logger.error(f"自动重排序过程中发生意外错误: {e}")
+            logger.error(f"重排序过程中发生意外错误: {e}")
             results["summary"]["status"] = "completed_with_resorting_error"
             results["summary"]["resorting_error"] = str(e)
 
-        return results
-
 
 def create_incremental_updater(
     coins_dir: str = "data/coins",
     daily_dir: str = "data/daily/daily_files",
     backup_enabled: bool = False,  # 默认禁用备份
+    market_cache_ttl: float = 0,  # 默认不缓存市值排名
 ) -> IncrementalDailyUpdater:
     """创建增量每日数据更新器实例
 
@@ -675,8 +1217,11 @@ def create_incremental_updater(
         coins_dir: 币种数据目录
         daily_dir: 每日数据目录
         backup_enabled: 是否启用备份
+        market_cache_ttl: 市值排名缓存有效期（秒），0 表示不缓存
 
     Returns:
         IncrementalDailyUpdater 实例
     """
-    return IncrementalDailyUpdater(coins_dir, daily_dir, backup_enabled)
+    return IncrementalDailyUpdater(
+        coins_dir, daily_dir, backup_enabled, market_cache_ttl
+    )
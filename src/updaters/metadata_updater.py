@@ -10,15 +10,21 @@
 4. 增量更新和强制更新模式
 """
 
+import csv
 import logging
+import os
 import time
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from operator import itemgetter
 from pathlib import Path
-from typing import Dict, List, Optional, Set
+from typing import Deque, Dict, List, Optional, Set, Tuple
 
 from tqdm import tqdm
 
 from ..classification.unified_classifier import UnifiedClassifier
 from ..downloaders.batch_downloader import create_batch_downloader
+from ..utils.concurrent_utils import TokenBucket
 
 logger = logging.getLogger(__name__)
 
@@ -26,12 +32,18 @@ logger = logging.getLogger(__name__)
 class MetadataUpdater:
     """元数据更新器 - 提供完整的元数据管理功能"""
 
-    def __init__(self, project_root: Optional[Path] = None):
+    def __init__(
+        self,
+        project_root: Optional[Path] = None,
+        requests_per_minute: Optional[float] = None,
+    ):
         """
         初始化元数据更新器
 
         Args:
             project_root: 项目根目录，如果为None则自动推导
+            requests_per_minute: 元数据请求的速率上限（次/分钟），
+                None 表示按 delay_seconds 推算（每秒 1/delay_seconds 次）
         """
         if project_root is None:
             # 从模块位置推导项目根目录 (src/updaters -> project_root)
@@ -41,10 +53,12 @@ class MetadataUpdater:
 
         self.coins_dir = self.project_root / "data" / "coins"
         self.metadata_dir = self.project_root / "data" / "metadata"
+        self.requests_per_minute = requests_per_minute
 
-        # 初始化统一分类器和下载器
-        self.classifier = UnifiedClassifier()
+        # 初始化下载器和统一分类器（分类器复用同一个下载器，
+        # 避免重复创建 API 会话和日志文件处理器）
         self.downloader = create_batch_downloader()
+        self.classifier = UnifiedClassifier(downloader=self.downloader)
 
     def get_all_coin_ids_from_data(self) -> List[str]:
         """
@@ -53,16 +67,17 @@ class MetadataUpdater:
         Returns:
             币种 ID 列表
         """
-        coin_ids = []
-
         if not self.coins_dir.exists():
             logger.error(f"data/coins/ 目录不存在: {self.coins_dir}")
             return []
 
-        # 扫描所有 CSV 文件
-        for csv_file in self.coins_dir.glob("*.csv"):
-            coin_id = csv_file.stem  # 去掉 .csv 后缀
-            coin_ids.append(coin_id)
+        # 扫描所有 CSV 文件（os.scandir 直接返回文件名，无需为每个文件构造 Path）
+        with os.scandir(self.coins_dir) as entries:
+            coin_ids = [
+                entry.name[:-4]  # 去掉 .csv 后缀
+                for entry in entries
+                if entry.name.endswith(".csv") and entry.is_file()
+            ]
 
         # 按字母顺序排序
         coin_ids.sort()
@@ -81,9 +96,10 @@ class MetadataUpdater:
         existing_ids = set()
 
         if metadata_coin_dir.exists():
-            for json_file in metadata_coin_dir.glob("*.json"):
-                coin_id = json_file.stem
-                existing_ids.add(coin_id)
+            with os.scandir(metadata_coin_dir) as entries:
+                for entry in entries:
+                    if entry.name.endswith(".json") and entry.is_file():
+                        existing_ids.add(entry.name[:-5])
 
         return existing_ids
 
@@ -92,14 +108,18 @@ class MetadataUpdater:
         batch_size: int = 50,
         delay_seconds: float = 0.5,
         force_update: bool = False,
+        max_workers: int = 8,
+        adaptive: bool = False,
     ) -> Dict[str, bool]:
         """
         批量更新所有币种的元数据
 
         Args:
-            batch_size: 每批处理的币种数量
+            batch_size: 每批处理的币种数量（adaptive 模式下为初始值）
             delay_seconds: 每次API调用的延迟
             force_update: 是否强制更新
+            max_workers: 并发请求的线程数，1 表示逐个串行更新
+            adaptive: 是否按批次成功率自适应调整批次大小和请求速率
 
         Returns:
             更新结果字典 {coin_id: success}
@@ -136,18 +156,45 @@ class MetadataUpdater:
         success_count = 0
         all_results = {}
 
-        logger.info(f"开始分批更新，共 {total_batches} 批")
-
-        # 使用进度条显示批次进度
-        with tqdm(total=total_batches, desc="批量更新元数据", unit="批") as batch_pbar:
-            for batch_idx in range(total_batches):
-                start_idx = batch_idx * batch_size
+        if adaptive:
+            logger.info(f"开始自适应分批更新，初始批次大小 {batch_size}")
+        else:
+            logger.info(f"开始分批更新，共 {total_batches} 批")
+
+        # 令牌桶在所有线程间共享，按配额主动放行请求，取代固定的休眠间隔
+        rate_per_sec = self._get_request_rate(delay_seconds)
+        bucket = (
+            TokenBucket(rate_per_sec, capacity=max(1, max_workers))
+            if rate_per_sec
+            else None
+        )
+        serial_delay = (
+            60 / self.requests_per_minute if self.requests_per_minute else delay_seconds
+        )
+
+        # 自适应模式：throttle 为请求间隔的放大倍数，recent_rates 为最近批次成功率
+        throttle = 1.0
+        recent_rates: Deque[float] = deque(maxlen=3)
+
+        # 元数据请求受网络延迟主导，多线程并发可以显著缩短总耗时
+        # （线程在首次提交任务时才会创建，串行模式下不会产生额外开销）
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor, tqdm(
+            total=len(coins_to_update), desc="批量更新元数据", unit="个"
+        ) as batch_pbar:
+            batch_idx = 0
+            start_idx = 0
+            while start_idx < len(coins_to_update):
                 end_idx = min(start_idx + batch_size, len(coins_to_update))
                 batch_coins = coins_to_update[start_idx:end_idx]
-
-                batch_info = (
-                    f"第 {batch_idx + 1}/{total_batches} 批 ({len(batch_coins)} 个币种)"
-                )
+                start_idx = end_idx
+                batch_idx += 1
+
+                if adaptive:
+                    batch_info = f"第 {batch_idx} 批 ({len(batch_coins)} 个币种)"
+                else:
+                    batch_info = (
+                        f"第 {batch_idx}/{total_batches} 批 ({len(batch_coins)} 个币种)"
+                    )
                 batch_pbar.set_description(f"处理 {batch_info}")
 
                 logger.info(f"\n📦 处理{batch_info}")
@@ -156,11 +203,16 @@ class MetadataUpdater:
                 )
 
                 # 批量更新这一批币种
-                results = self.downloader.batch_update_coin_metadata(
-                    coin_ids=batch_coins,
-                    force=force_update,
-                    delay_seconds=delay_seconds,
-                )
+                if max_workers <= 1:
+                    results = self.downloader.batch_update_coin_metadata(
+                        coin_ids=batch_coins,
+                        force=force_update,
+                        delay_seconds=serial_delay * throttle,
+                    )
+                else:
+                    results = self._update_batch_concurrently(
+                        executor, batch_coins, force_update, bucket
+                    )
 
                 # 合并结果
                 all_results.update(results)
@@ -171,7 +223,7 @@ class MetadataUpdater:
 
                 # 更新进度条
                 batch_pbar.set_postfix_str(f"成功: {batch_success}/{len(batch_coins)}")
-                batch_pbar.update(1)
+                batch_pbar.update(len(batch_coins))
 
                 logger.info(f"   批次结果: {batch_success}/{len(batch_coins)} 成功")
 
@@ -182,12 +234,122 @@ class MetadataUpdater:
                 if failed_coins:
                     logger.warning(f"   失败币种: {', '.join(failed_coins)}")
 
+                # 自适应调整下一批的批次大小和请求速率
+                if adaptive:
+                    recent_rates.append(batch_success / len(batch_coins))
+                    new_size, new_throttle = self._adapt_batch_policy(
+                        batch_size, throttle, recent_rates
+                    )
+                    if (new_size, new_throttle) != (batch_size, throttle):
+                        logger.info(
+                            f"   自适应调整: 批次大小 {batch_size} -> {new_size}, "
+                            f"请求间隔倍数 {throttle:g} -> {new_throttle:g}"
+                        )
+                        batch_size, throttle = new_size, new_throttle
+                        if bucket is not None:
+                            bucket.set_rate(rate_per_sec / throttle)
+
         logger.info(f"\n🎉 批量更新完成!")
         logger.info(f"   总计: {success_count}/{len(coins_to_update)} 成功")
         logger.info(f"   失败: {len(coins_to_update) - success_count} 个")
 
         return all_results
 
+    @staticmethod
+    def _adapt_batch_policy(
+        batch_size: int, throttle: float, recent_rates: Deque[float]
+    ) -> Tuple[int, float]:
+        """
+        按 AIMD 策略计算下一批的批次大小和请求间隔倍数
+
+        - 最新一批成功率低于 90%：批次大小减半，请求间隔加倍
+        - 最近 3 批平均成功率不低于 98%：批次大小放大 1.25 倍（上限 256），
+          请求间隔倍数逐步恢复到 1
+
+        Args:
+            batch_size: 当前批次大小
+            throttle: 当前请求间隔倍数
+            recent_rates: 最近批次的成功率（最多 3 个）
+
+        Returns:
+            (新的批次大小, 新的请求间隔倍数)
+        """
+        if recent_rates[-1] < 0.9:
+            # 失败后清空窗口，避免旧批次的高成功率立即触发放大
+            recent_rates.clear()
+            return max(1, batch_size // 2), throttle * 2
+
+        if (
+            len(recent_rates) == recent_rates.maxlen
+            and sum(recent_rates) / len(recent_rates) >= 0.98
+        ):
+            grown = max(batch_size + 1, int(batch_size * 1.25))
+            new_size = max(batch_size, min(256, grown))
+            return new_size, max(1.0, throttle / 2)
+
+        return batch_size, throttle
+
+    def _get_request_rate(self, delay_seconds: float) -> Optional[float]:
+        """
+        计算元数据请求的速率上限
+
+        Args:
+            delay_seconds: 每次API调用的延迟（未设置 requests_per_minute 时使用）
+
+        Returns:
+            每秒请求数，None 表示不限速
+        """
+        if self.requests_per_minute:
+            return self.requests_per_minute / 60
+        if delay_seconds > 0:
+            return 1 / delay_seconds
+        return None
+
+    def _update_batch_concurrently(
+        self,
+        executor: ThreadPoolExecutor,
+        batch_coins: List[str],
+        force_update: bool,
+        bucket: Optional[TokenBucket] = None,
+    ) -> Dict[str, bool]:
+        """
+        使用线程池并发更新一批币种的元数据
+
+        与串行模式一致，每个币种只尝试一次；令牌桶交给下载器，
+        只有实际发起 API 请求时才获取令牌，无需更新的币种不消耗配额。
+
+        Args:
+            executor: 线程池
+            batch_coins: 本批币种ID列表
+            force_update: 是否强制更新
+            bucket: 共享的令牌桶
+
+        Returns:
+            更新结果字典 {coin_id: success}，顺序与 batch_coins 一致
+        """
+        previous_limiter = self.downloader.rate_limiter
+        self.downloader.rate_limiter = bucket
+        try:
+            futures = {
+                executor.submit(
+                    self.downloader.update_coin_metadata, coin_id, force_update
+                ): coin_id
+                for coin_id in batch_coins
+            }
+
+            completed = {}
+            for future in as_completed(futures):
+                coin_id = futures[future]
+                try:
+                    completed[coin_id] = future.result()
+                except Exception as e:
+                    logger.error(f"更新币种元数据失败 ({coin_id}): {e}")
+                    completed[coin_id] = False
+        finally:
+            self.downloader.rate_limiter = previous_limiter
+
+        return {coin_id: completed[coin_id] for coin_id in batch_coins}
+
     def generate_complete_stablecoin_list(self) -> bool:
         """
         生成完整的稳定币列表
@@ -233,12 +395,14 @@ class MetadataUpdater:
 
             # 按名称排序显示
             stablecoins.sort(key=lambda x: x["name"] or "")
-            for i, coin in enumerate(stablecoins, 1):
-                symbol = (coin["symbol"] or "").upper()
-                name = coin["name"] or coin["coin_id"]
-                categories = coin["stablecoin_categories"] or []
-                logger.info(f"  {i:2d}. {name} ({symbol})")
-                logger.info(f"      分类: {', '.join(categories)}")
+            # 逐币种明细只在 INFO 级别可见时才格式化
+            if logger.isEnabledFor(logging.INFO):
+                for i, coin in enumerate(stablecoins, 1):
+                    symbol = (coin["symbol"] or "").upper()
+                    name = coin["name"] or coin["coin_id"]
+                    categories = coin["stablecoin_categories"] or []
+                    logger.info("  %2d. %s (%s)", i, name, symbol)
+                    logger.info("      分类: %s", ", ".join(categories))
 
             # 使用统一分类器的导出功能
             stablecoin_ids = [coin["coin_id"] for coin in stablecoins]
@@ -252,16 +416,15 @@ class MetadataUpdater:
             logger.info(f"\n📊 稳定币分析:")
 
             # 按分类统计
-            category_counts = {}
-            for coin in stablecoins:
-                for category in coin["stablecoin_categories"]:
-                    category_counts[category] = category_counts.get(category, 0) + 1
+            category_counts = Counter(
+                category
+                for coin in stablecoins
+                for category in coin["stablecoin_categories"]
+            )
 
             logger.info("   主要分类:")
-            for category, count in sorted(
-                category_counts.items(), key=lambda x: x[1], reverse=True
-            ):
-                logger.info(f"     - {category}: {count} 个")
+            for category, count in category_counts.most_common():
+                logger.info("     - %s: %d 个", category, count)
 
             return success
 
@@ -315,15 +478,19 @@ class MetadataUpdater:
 
             # 按名称排序显示
             wrapped_coins.sort(key=lambda x: x["name"] or "")
-            for i, coin in enumerate(wrapped_coins, 1):
-                symbol = (coin["symbol"] or "").upper()
-                name = coin["name"] or coin["coin_id"]
-                confidence = coin["confidence"]
-                categories = coin["wrapped_categories"] or []
-
-                logger.info(f"  {i:2d}. {name} ({symbol}) - 置信度: {confidence}")
-                if categories:
-                    logger.info(f"      分类: {', '.join(categories[:3])}")
+            # 逐币种明细只在 INFO 级别可见时才格式化
+            if logger.isEnabledFor(logging.INFO):
+                for i, coin in enumerate(wrapped_coins, 1):
+                    symbol = (coin["symbol"] or "").upper()
+                    name = coin["name"] or coin["coin_id"]
+                    confidence = coin["confidence"]
+                    categories = coin["wrapped_categories"] or []
+
+                    logger.info(
+                        "  %2d. %s (%s) - 置信度: %s", i, name, symbol, confidence
+                    )
+                    if categories:
+                        logger.info("      分类: %s", ", ".join(categories[:3]))
 
             # 使用统一分类器的导出功能
             wrapped_coin_ids = [coin["coin_id"] for coin in wrapped_coins]
@@ -337,29 +504,23 @@ class MetadataUpdater:
             logger.info(f"\n📊 包装币分析:")
 
             # 按置信度统计
-            confidence_counts = {}
-            for coin in wrapped_coins:
-                conf = coin["confidence"]
-                confidence_counts[conf] = confidence_counts.get(conf, 0) + 1
+            confidence_counts = Counter(coin["confidence"] for coin in wrapped_coins)
 
             logger.info("   置信度分布:")
-            for conf, count in sorted(
-                confidence_counts.items(), key=lambda x: x[1], reverse=True
-            ):
-                logger.info(f"     - {conf}: {count} 个")
+            for conf, count in confidence_counts.most_common():
+                logger.info("     - %s: %d 个", conf, count)
 
             # 按分类统计
-            category_counts = {}
-            for coin in wrapped_coins:
-                for category in coin["wrapped_categories"]:
-                    category_counts[category] = category_counts.get(category, 0) + 1
+            category_counts = Counter(
+                category
+                for coin in wrapped_coins
+                for category in coin["wrapped_categories"]
+            )
 
             if category_counts:
                 logger.info("   主要分类:")
-                for category, count in sorted(
-                    category_counts.items(), key=lambda x: x[1], reverse=True
-                ):
-                    logger.info(f"     - {category}: {count} 个")
+                for category, count in category_counts.most_common():
+                    logger.info("     - %s: %d 个", category, count)
 
             return success
 
@@ -390,59 +551,72 @@ class MetadataUpdater:
                 logger.error("❌ 没有找到任何币种数据")
                 return False
 
+            # 币种列表和元数据文件均未变化时，上次生成的原生币列表仍然有效
+            output_path = self.metadata_dir / "native_coins.csv"
+            digest_path = self.metadata_dir / ".native_coins.digest"
+            digest = self.classifier.metadata_digest(coin_ids)
+            if (
+                output_path.exists()
+                and digest_path.exists()
+                and digest_path.read_text(encoding="utf-8") == digest
+            ):
+                logger.info(f"✅ 原生币列表已是最新，跳过重新生成: {output_path}")
+                return True
+
             # 使用统一分类器批量分类所有币种
             logger.info("🔍 正在分析所有币种...")
             classification_results = self.classifier.classify_coins_batch(coin_ids)
 
-            # 分类汇总
-            stablecoin_results = []
-            wrapped_results = []
+            # 单次遍历分类结果：统计稳定币/包装币，并直接用结果中已解析的
+            # 元数据构建原生币行，避免再次逐个读取 JSON 文件
+            stablecoin_count = 0
+            wrapped_count = 0
+            native_count = 0
+            native_rows = []
 
-            for coin_id, result in classification_results.items():
+            for coin_id in coin_ids:
+                result = classification_results[coin_id]
                 if result.is_stablecoin:
-                    stablecoin_results.append(coin_id)
+                    stablecoin_count += 1
                 if result.is_wrapped_coin:
-                    wrapped_results.append(coin_id)
-
-            # 生成原生币列表（排除稳定币和包装币）
-            excluded_coins = set(stablecoin_results + wrapped_results)
-            native_coins = [
-                coin_id for coin_id in coin_ids if coin_id not in excluded_coins
-            ]
+                    wrapped_count += 1
+                if result.is_stablecoin or result.is_wrapped_coin:
+                    continue
+
+                native_count += 1
+                # 没有元数据的币种（分类置信度为 unknown）不写入列表
+                if result.confidence == "unknown":
+                    continue
+                native_rows.append(
+                    (
+                        coin_id,
+                        result.name,
+                        result.symbol,
+                        ";".join(result.all_categories or []),
+                        result.last_updated,
+                    )
+                )
 
             logger.info(f"📊 原生币统计:")
             logger.info(f"   总币种数: {len(coin_ids)}")
-            logger.info(f"   稳定币数: {len(stablecoin_results)}")
-            logger.info(f"   包装币数: {len(wrapped_results)}")
-            logger.info(f"   原生币数: {len(native_coins)}")
-
-            # 导出到CSV
-            import pandas as pd
-
-            # 准备数据
-            csv_data = []
-            for coin_id in native_coins:
-                metadata = self.downloader._load_coin_metadata(coin_id)
-                if metadata:
-                    csv_data.append(
-                        {
-                            "coin_id": coin_id,
-                            "name": metadata.get("name", ""),
-                            "symbol": metadata.get("symbol", ""),
-                            "categories": ";".join(metadata.get("categories", [])),
-                            "last_updated": metadata.get("last_updated", ""),
-                        }
-                    )
+            logger.info(f"   稳定币数: {stablecoin_count}")
+            logger.info(f"   包装币数: {wrapped_count}")
+            logger.info(f"   原生币数: {native_count}")
 
-            # 创建DataFrame并保存
-            df = pd.DataFrame(csv_data)
-            df = df.sort_values("coin_id")
+            # 按币种ID排序后直接用 csv 模块写出，无需构建 DataFrame
+            native_rows.sort(key=itemgetter(0))
 
-            output_path = self.metadata_dir / "native_coins.csv"
-            df.to_csv(output_path, index=False, encoding="utf-8-sig")
+            with open(output_path, "w", newline="", encoding="utf-8-sig") as f:
+                writer = csv.writer(f, lineterminator="\n")
+                writer.writerow(
+                    ["coin_id", "name", "symbol", "categories", "last_updated"]
+                )
+                writer.writerows(native_rows)
+            # 列表写入成功后再记录摘要
+            digest_path.write_text(digest, encoding="utf-8")
 
             logger.info(f"\n💾 原生币列表已导出到: {output_path}")
-            logger.info(f"   共导出 {len(csv_data)} 个原生币")
+            logger.info(f"   共导出 {len(native_rows)} 个原生币")
 
             return True
 
@@ -461,6 +635,10 @@ class MetadataUpdater:
 
         logger.info("🔄 开始更新所有分类列表...")
 
+        # 启用分类结果清单：只重新分类元数据文件有变化的币种
+        cached_count = self.classifier.load_manifest()
+        logger.info(f"📋 分类结果清单: {cached_count} 个币种")
+
         # 1. 生成稳定币列表
         results["stablecoins"] = self.generate_complete_stablecoin_list()
 
@@ -470,6 +648,9 @@ class MetadataUpdater:
         # 3. 生成原生币列表
         results["native_coins"] = self.generate_complete_native_coin_list()
 
+        # 保存本次更新后的分类结果清单
+        self.classifier.save_manifest()
+
         # 汇总结果
         success_count = sum(1 for success in results.values() if success)
         total_count = len(results)
@@ -490,7 +671,10 @@ class MetadataUpdater:
 
 # 便捷函数，用于向后兼容
 def batch_update_all_metadata(
-    batch_size: int = 50, delay_seconds: float = 0.5, force_update: bool = False
+    batch_size: int = 50,
+    delay_seconds: float = 0.5,
+    force_update: bool = False,
+    max_workers: int = 8,
 ) -> Dict[str, bool]:
     """
     便捷函数：批量更新所有元数据
@@ -499,12 +683,15 @@ def batch_update_all_metadata(
         batch_size: 每批处理的币种数量
         delay_seconds: 每次API调用的延迟
         force_update: 是否强制更新
+        max_workers: 并发请求的线程数
 
     Returns:
         更新结果字典
     """
     updater = MetadataUpdater()
-    return updater.batch_update_all_metadata(batch_size, delay_seconds, force_update)
+    return updater.batch_update_all_metadata(
+        batch_size, delay_seconds, force_update, max_workers
+    )
 
 
 def update_all_classification_lists() -> Dict[str, bool]:
@@ -22,16 +22,20 @@
 
 import logging
 import math
+import os
 import time
-from datetime import datetime, timezone
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from datetime import date, datetime, timezone
 from pathlib import Path
 from typing import Dict, List, Optional, Set, Tuple
 
+import pandas as pd
 from tqdm import tqdm
 
 from ..api.coingecko import CoinGeckoAPI
 from ..classification.unified_classifier import UnifiedClassifier
 from ..downloaders.batch_downloader import create_batch_downloader
+from ..utils.concurrent_utils import TokenBucket
 
 # API限流配置
 RATE_LIMIT_CONFIG = {
@@ -120,8 +124,13 @@ class PriceDataUpdater:
     def __init__(self):
         self.api = CoinGeckoAPI()
         self.downloader = create_batch_downloader()
-        self.classifier = UnifiedClassifier()  # 直接使用统一分类器
+        # 直接使用统一分类器，并复用同一个下载器
+        self.classifier = UnifiedClassifier(downloader=self.downloader)
         self.market_fetcher = MarketDataFetcher(self.api)
+        # 全局令牌桶：并发下载时整体速率仍不超过 API 限额；
+        # 交给下载器在每次 HTTP 请求（包括重试）前获取令牌
+        self.rate_limiter = TokenBucket(RATE_LIMIT_CONFIG["calls_per_minute"] / 60.0)
+        self.downloader.rate_limiter = self.rate_limiter
 
         # 目录设置
         self.coins_dir = Path("data/coins")
@@ -197,11 +206,6 @@ class PriceDataUpdater:
             bool: 数据质量是否良好
         """
         try:
-            import os
-            from datetime import date
-
-            import pandas as pd
-
             # 1. 检查文件修改时间
             mtime = os.path.getmtime(csv_file)
             file_date = date.fromtimestamp(mtime)
@@ -252,8 +256,153 @@ class PriceDataUpdater:
                 existing_ids.add(coin_id)
         return existing_ids
 
+    def _classify_coin_type(self, coin_id: str) -> str:
+        """使用统一分类器确定币种类型: stable / wrapped / native"""
+        classification_result = self.classifier.classify_coin(coin_id)
+        if classification_result.is_stablecoin:
+            return "stable"
+        if classification_result.is_wrapped_coin:
+            return "wrapped"
+        return "native"
+
+    def _record_coin_result(
+        self,
+        coin_id: str,
+        coin_type: str,
+        success: bool,
+        api_called: bool,
+        existing_ids: Set[str],
+    ) -> None:
+        """根据单个币种的下载结果更新统计信息（仅在主线程调用）"""
+        # 只在实际调用API时计数
+        if api_called:
+            self.stats["api_calls"] += 1
+
+        if success:
+            if coin_type == "native":
+                self.stats["native_updated"] += 1
+            elif coin_type == "stable":
+                self.stats["stable_updated"] += 1
+            elif coin_type == "wrapped":
+                self.stats["wrapped_updated"] += 1
+
+            # 检查是否是新币种
+            if coin_id not in existing_ids:
+                self.stats["new_coins"] += 1
+                existing_ids.add(coin_id)
+        else:
+            self.stats["failed_updates"] += 1
+            self.errors.append(f"{coin_id}: 下载失败")
+
+        self.stats["total_processed"] += 1
+
+    def _process_coins_in_order(
+        self,
+        all_coins: List[Dict],
+        target_native_coins: int,
+        native_coins_updated: int,
+        existing_ids: Set[str],
+        pbar,
+        max_workers: int = 16,
+    ) -> int:
+        """
+        按市值顺序并发下载币种数据，直到原生币达到目标数量
+
+        分类在主线程完成，下载提交到线程池，全局速率由 self.rate_limiter 控制。
+        当"已成功的原生币 + 下载中的原生币"达到目标时暂停提交，
+        若其中有失败再继续向后补位，因此处理的币种与逐个下载时一致。
+
+        Args:
+            all_coins: 按市值排序的币种列表
+            target_native_coins: 目标原生币种数量
+            native_coins_updated: 已成功更新的原生币数量
+            existing_ids: 已存在的币种ID集合（会被更新）
+            pbar: 进度条
+            max_workers: 并发下载线程数
+
+        Returns:
+            int: 更新后的原生币成功数量
+        """
+        max_workers = max(1, max_workers)
+        # 所有线程共享下载器的会话，连接池需容纳全部并发请求
+        self.downloader.api.set_pool_size(max_workers)
+        coins = iter(all_coins)
+        pending: Dict[Future, Tuple[str, str, str]] = {}
+        native_in_flight = 0
+        exhausted = False
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            while True:
+                # 在并发上限内按顺序提交下载任务
+                while (
+                    not exhausted
+                    and len(pending) < max_workers
+                    and native_coins_updated + native_in_flight < target_native_coins
+                ):
+                    coin_info = next(coins, None)
+                    if coin_info is None:
+                        exhausted = True
+                        break
+
+                    coin_id = coin_info["id"]
+                    coin_symbol = coin_info["symbol"].upper()
+                    try:
+                        coin_type = self._classify_coin_type(coin_id)
+                    except Exception as e:
+                        logger.error(f"处理 {coin_id} 时出错: {e}")
+                        self.errors.append(f"{coin_id}: {str(e)}")
+                        self.stats["failed_updates"] += 1
+                        pbar.update(1)
+                        continue
+
+                    # 每个币种都直接下载全量数据，简单直接
+                    future = executor.submit(self.download_coin_data, coin_id)
+                    pending[future] = (coin_id, coin_symbol, coin_type)
+                    if coin_type == "native":
+                        native_in_flight += 1
+
+                if not pending:
+                    break
+
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    coin_id, coin_symbol, coin_type = pending.pop(future)
+                    if coin_type == "native":
+                        native_in_flight -= 1
+
+                    try:
+                        success, api_called = future.result()
+                        self._record_coin_result(
+                            coin_id, coin_type, success, api_called, existing_ids
+                        )
+                        if success and coin_type == "native":
+                            native_coins_updated += 1
+                    except Exception as e:
+                        logger.error(f"处理 {coin_id} 时出错: {e}")
+                        self.errors.append(f"{coin_id}: {str(e)}")
+                        self.stats["failed_updates"] += 1
+
+                    # 更新进度条
+                    pbar.set_postfix(
+                        {
+                            "原生币": native_coins_updated,
+                            "目标": target_native_coins,
+                            "类型": coin_type,
+                            "当前": coin_symbol[:10],
+                        }
+                    )
+                    pbar.update(1)
+
+        if native_coins_updated >= target_native_coins:
+            logger.info(f"🎯 已达到目标！成功处理 {native_coins_updated} 个原生币种")
+
+        return native_coins_updated
+
     def update_with_smart_strategy(
-        self, target_native_coins: int = 510, max_search_range: int = 1000
+        self,
+        target_native_coins: int = 510,
+        max_search_range: int = 1000,
+        max_workers: int = 16,
     ):
         """
         智能更新策略
@@ -261,6 +410,7 @@ class PriceDataUpdater:
         Args:
             target_native_coins: 目标原生币种数量
             max_search_range: 最大搜索范围
+            max_workers: 并发下载线程数，1 表示逐个下载
         """
         logger.info(f"🚀 开始智能量价数据更新")
         logger.info(f"📋 目标: 确保至少 {target_native_coins} 个原生币种数据最新")
@@ -289,7 +439,7 @@ class PriceDataUpdater:
                 # 获取市值排名数据
                 all_coins = self.market_fetcher.get_top_coins(search_range)
 
-                # 按顺序处理每个币种
+                # 按市值顺序并发处理币种
                 with tqdm(
                     total=len(all_coins),
                     desc="处理币种数据",
@@ -297,82 +447,14 @@ class PriceDataUpdater:
                     ncols=120,
                     leave=False,
                 ) as pbar:
-                    for coin_info in all_coins:
-                        coin_id = coin_info["id"]
-                        coin_symbol = coin_info["symbol"].upper()
-
-                        try:
-                            # 使用统一分类器进行分类
-                            classification_result = self.classifier.classify_coin(
-                                coin_id
-                            )
-
-                            # 确定币种类型
-                            if classification_result.is_stablecoin:
-                                coin_type = "stable"
-                            elif classification_result.is_wrapped_coin:
-                                coin_type = "wrapped"
-                            else:
-                                coin_type = "native"
-
-                            # 检查是否需要更新
-                            # 每个币种都直接下载全量数据，简单直接
-                            success, api_called = self.download_coin_data(coin_id)
-
-                            if success:
-                                # 更新统计
-                                if coin_type == "native":
-                                    native_coins_updated += 1
-                                    self.stats["native_updated"] += 1
-                                elif coin_type == "stable":
-                                    self.stats["stable_updated"] += 1
-                                elif coin_type == "wrapped":
-                                    self.stats["wrapped_updated"] += 1
-
-                                # 检查是否是新币种
-                                if coin_id not in existing_ids:
-                                    self.stats["new_coins"] += 1
-                                    existing_ids.add(coin_id)
-
-                                # 只在实际调用API时计数
-                                if api_called:
-                                    self.stats["api_calls"] += 1
-
-                                # API限流延迟（只在实际调用API时延迟）
-                                if api_called:
-                                    time.sleep(RATE_LIMIT_CONFIG["delay_seconds"])
-                            else:
-                                # 失败的情况也要统计API调用
-                                if api_called:
-                                    self.stats["api_calls"] += 1
-                                self.stats["failed_updates"] += 1
-                                self.errors.append(f"{coin_id}: 下载失败")
-
-                            self.stats["total_processed"] += 1
-
-                            # 更新进度条
-                            pbar.set_postfix(
-                                {
-                                    "原生币": native_coins_updated,
-                                    "目标": target_native_coins,
-                                    "类型": coin_type,
-                                    "当前": coin_symbol[:10],
-                                }
-                            )
-                            pbar.update(1)
-
-                            # 如果已达到目标，提前结束
-                            if native_coins_updated >= target_native_coins:
-                                logger.info(
-                                    f"🎯 已达到目标！成功处理 {native_coins_updated} 个原生币种"
-                                )
-                                break
-
-                        except Exception as e:
-                            logger.error(f"处理 {coin_id} 时出错: {e}")
-                            self.errors.append(f"{coin_id}: {str(e)}")
-                            self.stats["failed_updates"] += 1
-                            pbar.update(1)
+                    native_coins_updated = self._process_coins_in_order(
+                        all_coins,
+                        target_native_coins,
+                        native_coins_updated,
+                        existing_ids,
+                        pbar,
+                        max_workers,
+                    )
 
                 # 检查是否需要扩大搜索范围
                 if native_coins_updated < target_native_coins:
@@ -419,8 +501,6 @@ class PriceDataUpdater:
             classifier = UnifiedClassifier()
 
             # 获取所有币种数据
-            from ..downloaders.batch_downloader import create_batch_downloader
-
             downloader = create_batch_downloader()
             metadata_dir = Path(downloader.data_dir) / "metadata" / "coin_metadata"
 
@@ -5,7 +5,12 @@
 """
 
 from .progress_utils import ProgressTracker, BatchProgressTracker, progress_wrapper
-from .concurrent_utils import ConcurrentProcessor, auto_concurrent_map, BatchProcessor
+from .concurrent_utils import (
+    ConcurrentProcessor,
+    auto_concurrent_map,
+    BatchProcessor,
+    TokenBucket,
+)
 
 __all__ = [
     "ProgressTracker",
@@ -14,4 +19,5 @@ __all__ = [
     "ConcurrentProcessor",
     "auto_concurrent_map",
     "BatchProcessor",
+    "TokenBucket",
 ]
@@ -9,6 +9,8 @@
 import logging
 import multiprocessing
 import os
+import threading
+import time
 from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from functools import partial
 from typing import Any, Callable, Dict, List, Optional, Union
@@ -244,6 +246,60 @@ class BatchProcessor:
         return all_results
 
 
+class TokenBucket:
+    """令牌桶限速器，按固定速率补充令牌，可在多个线程间共享"""
+
+    def __init__(self, rate_per_sec: float, capacity: Optional[float] = None):
+        """
+        初始化令牌桶
+
+        Args:
+            rate_per_sec: 每秒补充的令牌数（即平均请求速率）
+            capacity: 桶容量（允许的突发请求数），None 表示等于每秒速率
+        """
+        if rate_per_sec <= 0:
+            raise ValueError("rate_per_sec 必须大于 0")
+
+        self.rate_per_sec = rate_per_sec
+        self.capacity = max(1.0, capacity if capacity is not None else rate_per_sec)
+        self._tokens = self.capacity
+        self._last_refill = time.monotonic()
+        self._condition = threading.Condition()
+
+    def _refill(self) -> None:
+        """按距上次补充的时间补充令牌（调用方需持有锁）"""
+        now = time.monotonic()
+        elapsed = now - self._last_refill
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.rate_per_sec)
+        self._last_refill = now
+
+    def set_rate(self, rate_per_sec: float) -> None:
+        """
+        调整令牌补充速率（已积累的令牌按旧速率结算）
+
+        Args:
+            rate_per_sec: 新的每秒令牌数
+        """
+        if rate_per_sec <= 0:
+            raise ValueError("rate_per_sec 必须大于 0")
+
+        with self._condition:
+            self._refill()
+            self.rate_per_sec = rate_per_sec
+
+    def acquire(self) -> None:
+        """
+        获取一个令牌，令牌不足时阻塞到补充出下一个令牌为止
+        """
+        with self._condition:
+            self._refill()
+            while self._tokens < 1:
+                # 只等待补足一个令牌所需的时间，而不是固定的休眠间隔
+                self._condition.wait((1 - self._tokens) / self.rate_per_sec)
+                self._refill()
+            self._tokens -= 1
+
+
 def smart_concurrent_execution(
     items: List[Any],
     cpu_bound_func: Optional[Callable] = None,
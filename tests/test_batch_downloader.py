@@ -141,6 +141,57 @@ def test_convenience_function():
         print("✓ 便捷创建函数工作正常")
 
 
+def test_rate_limiter_per_attempt():
+    """测试共享令牌桶在每次 API 请求（包括重试）前获取令牌"""
+    print("\n测试6: 重试时的令牌获取")
+
+    mock_data = {
+        "prices": [[1640995200000, 46000.0]],
+        "market_caps": [[1640995200000, 870000000000]],
+        "total_volumes": [[1640995200000, 28000000000]],
+    }
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        mock_api = Mock(spec=CoinGeckoAPI)
+        mock_api.get_coin_market_chart.side_effect = [
+            Exception("429 Too Many Requests"),
+            Exception("429 Too Many Requests"),
+            mock_data,
+        ]
+        downloader = BatchDownloader(mock_api, temp_dir)
+        downloader.rate_limiter = Mock()
+
+        success = downloader._download_single_coin(
+            "bitcoin", "max", "usd", max_retries=3, retry_delay=0
+        )
+
+        assert success, "第三次尝试应该成功"
+        assert downloader.rate_limiter.acquire.call_count == 3, "每次请求都应获取令牌"
+
+        print("✓ 每次重试都获取令牌")
+
+
+def test_metadata_rate_limiter_only_on_request():
+    """测试元数据更新只在实际请求 API 时获取令牌"""
+    print("\n测试7: 元数据更新的令牌获取")
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        mock_api = Mock(spec=CoinGeckoAPI)
+        mock_api.get_coin_by_id.return_value = {"id": "bitcoin", "categories": []}
+        downloader = BatchDownloader(mock_api, temp_dir)
+        downloader.rate_limiter = Mock()
+
+        # 元数据无需更新时跳过，不消耗令牌
+        downloader._need_coin_metadata_update = Mock(return_value=False)
+        assert downloader.update_coin_metadata("bitcoin"), "跳过应视为成功"
+        assert downloader.rate_limiter.acquire.call_count == 0, "跳过时不应获取令牌"
+
+        assert downloader.update_coin_metadata("bitcoin", force=True), "更新应该成功"
+        assert downloader.rate_limiter.acquire.call_count == 1, "请求前应获取令牌"
+
+        print("✓ 只在实际请求时获取令牌")
+
+
 def run_all_tests():
     """运行所有测试"""
     print("=== 批量下载器测试套件 ===\n")
@@ -151,6 +202,8 @@ def run_all_tests():
         test_data_freshness_check()
         test_save_to_csv()
         test_convenience_function()
+        test_rate_limiter_per_attempt()
+        test_metadata_rate_limiter_only_on_request()
 
         print("\n=== 所有测试通过 ✓ ===")
 
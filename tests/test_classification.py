@@ -7,7 +7,11 @@
 这些检查器已被 UnifiedClassifier 替代并移动到 legacy/ 目录存档。
 """
 
+import json
+import os
+import tempfile
 import unittest
+from pathlib import Path
 from unittest.mock import patch
 
 from src.classification.unified_classifier import (
@@ -78,6 +82,114 @@ class TestUnifiedClassifier(unittest.TestCase):
         self.assertEqual(len(classifier._cache), 0)
         print("✅ 统一分类器缓存测试通过")
 
+    @patch("src.classification.unified_classifier.create_batch_downloader")
+    def test_classify_coins_batch_concurrent(self, mock_downloader):
+        """测试批量分类并发加载元数据且只加载未缓存的币种"""
+        print("\n--- 测试批量分类并发加载 ---")
+
+        def fake_load(coin_id):
+            if coin_id.startswith("usd"):
+                return {"name": coin_id, "categories": ["Stablecoins"]}
+            return {"name": coin_id, "categories": ["Layer 1 (L1)"]}
+
+        loader = mock_downloader.return_value._load_coin_metadata
+        loader.side_effect = fake_load
+
+        classifier = UnifiedClassifier()
+        coin_ids = [f"coin-{i:02d}" for i in range(20)] + ["usd-a", "usd-b"]
+
+        results = classifier.classify_coins_batch(coin_ids, max_workers=4)
+
+        # 结果顺序与输入一致，分类正确
+        self.assertEqual(list(results), coin_ids)
+        self.assertTrue(results["usd-a"].is_stablecoin)
+        self.assertFalse(results["coin-00"].is_stablecoin)
+        self.assertEqual(loader.call_count, len(coin_ids))
+
+        # 再次分类时全部命中缓存，不再读取元数据
+        again = classifier.classify_coins_batch(coin_ids[::-1])
+        self.assertEqual(list(again), coin_ids[::-1])
+        self.assertIs(again["coin-05"], results["coin-05"])
+        self.assertEqual(loader.call_count, len(coin_ids))
+        print("✅ 批量分类并发加载测试通过")
+
+    @patch("src.classification.unified_classifier.create_batch_downloader")
+    def test_classification_manifest(self, mock_downloader):
+        """测试分类结果清单只重新分类元数据有变化的币种"""
+        print("\n--- 测试分类结果清单 ---")
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            metadata_dir = Path(temp_dir) / "metadata" / "coin_metadata"
+            metadata_dir.mkdir(parents=True)
+            (metadata_dir / "bitcoin.json").write_text(
+                json.dumps({"name": "Bitcoin", "categories": ["Layer 1 (L1)"]})
+            )
+            (metadata_dir / "tether.json").write_text(
+                json.dumps({"name": "Tether", "categories": ["Stablecoins"]})
+            )
+
+            def fake_load(coin_id):
+                path = metadata_dir / f"{coin_id}.json"
+                return json.loads(path.read_text()) if path.exists() else None
+
+            loader = mock_downloader.return_value._load_coin_metadata
+            loader.side_effect = fake_load
+            coin_ids = ["bitcoin", "tether"]
+
+            # 首次运行：全部分类并写入清单
+            classifier = UnifiedClassifier(data_dir=temp_dir)
+            self.assertEqual(classifier.load_manifest(), 0)
+            classifier.classify_coins_batch(coin_ids)
+            self.assertTrue(classifier.save_manifest())
+            self.assertTrue(classifier.manifest_path.exists())
+            self.assertEqual(loader.call_count, 2)
+
+            # 修改 tether 的元数据后再次运行：只有 tether 被重新读取
+            (metadata_dir / "tether.json").write_text(
+                json.dumps({"name": "Tether", "categories": ["Wrapped-Tokens"]})
+            )
+            stat = os.stat(metadata_dir / "tether.json")
+            os.utime(
+                metadata_dir / "tether.json",
+                ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9),
+            )
+            loader.reset_mock()
+
+            classifier = UnifiedClassifier(data_dir=temp_dir)
+            self.assertEqual(classifier.load_manifest(), 2)
+            results = classifier.classify_coins_batch(coin_ids)
+
+            loader.assert_called_once_with("tether")
+
+            # 元数据摘要随文件签名变化
+            digest = classifier.metadata_digest(coin_ids)
+            self.assertEqual(digest, classifier.metadata_digest(coin_ids[::-1]))
+            os.utime(
+                metadata_dir / "bitcoin.json",
+                ns=(stat.st_atime_ns, stat.st_mtime_ns + 2 * 10**9),
+            )
+            self.assertNotEqual(digest, classifier.metadata_digest(coin_ids))
+            self.assertEqual(results["bitcoin"].name, "Bitcoin")
+            self.assertEqual(results["bitcoin"].all_categories, ["Layer 1 (L1)"])
+            self.assertTrue(results["tether"].is_wrapped_coin)
+            self.assertFalse(results["tether"].is_stablecoin)
+
+            # 分类规则（关键词或逻辑版本）变化后，清单整体作废
+            self.assertTrue(classifier.save_manifest())
+            self.assertEqual(UnifiedClassifier(data_dir=temp_dir).load_manifest(), 2)
+            with patch.object(
+                UnifiedClassifier, "WRAPPED_COIN_KEYWORDS", {"Wrapped-Tokens"}
+            ), self.assertLogs(
+                "src.classification.unified_classifier", level="DEBUG"
+            ) as logs:
+                classifier = UnifiedClassifier(data_dir=temp_dir)
+                self.assertEqual(classifier.load_manifest(), 0)
+            self.assertIn("分类规则已变化", logs.output[0])
+            with patch.object(UnifiedClassifier, "RULES_VERSION", 2):
+                classifier = UnifiedClassifier(data_dir=temp_dir)
+                self.assertEqual(classifier.load_manifest(), 0)
+        print("✅ 分类结果清单测试通过")
+
 
 if __name__ == "__main__":
     unittest.main()
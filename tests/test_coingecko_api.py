@@ -122,5 +122,16 @@ class TestCoinGeckoAPI(unittest.TestCase):
         print("成功获取 Bitcoin 7天内的OHLC数据")
 
 
+class TestCoinGeckoSession(unittest.TestCase):
+    """测试 API 会话配置（无需 API Key）"""
+
+    def test_set_pool_size(self):
+        """测试连接池大小随并发数调整"""
+        api = CoinGeckoAPI(api_key="test-key")
+        api.set_pool_size(16)
+        adapter = api.session.get_adapter(api.base_url)
+        self.assertEqual(adapter._pool_maxsize, 16)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -92,6 +92,10 @@ class TestIncrementalDailyUpdater(unittest.TestCase):
 
             self.assertEqual(existing, set(test_coins))
 
+            # 全新安装时币种目录尚不存在，应返回空集合而不是抛出异常
+            updater.coins_dir = self.coins_dir / "missing"
+            self.assertEqual(updater.get_existing_coins(), set())
+
         print(f"✅ 成功识别 {len(existing)} 个已有币种")
 
     def test_03_detect_new_coins(self):
@@ -171,6 +175,10 @@ class TestIncrementalDailyUpdater(unittest.TestCase):
                 self.assertIn("date", coin_df.columns)
                 self.assertIn("coin_id", coin_df.columns)
                 self.assertEqual(coin_df["coin_id"].iloc[0], "test-coin")
+                # 公共接口保持原有类型
+                self.assertIs(type(coin_df["date"].iloc[0]), date)
+                self.assertEqual(coin_df["date"].iloc[0], date(2021, 1, 1))
+                self.assertNotIsInstance(coin_df["coin_id"].dtype, pd.CategoricalDtype)
 
         print("✅ 币种数据加载测试通过")
 
@@ -402,6 +410,425 @@ class TestIncrementalDailyUpdater(unittest.TestCase):
 
         print("✅ 试运行模式测试通过")
 
+    def test_10_insert_coins_batch(self):
+        """测试同一日期批量插入多个币种"""
+        print("\n--- 测试 10: 批量插入币种到每日文件 ---")
+
+        target_date = date(2021, 1, 1)
+        month_dir = self.daily_dir / "2021" / "01"
+        month_dir.mkdir(parents=True)
+        daily_file_path = month_dir / f"{target_date}.csv"
+
+        pd.DataFrame(
+            {
+                "timestamp": [1609459200000],
+                "price": [29000.0],
+                "volume": [1000000.0],
+                "market_cap": [500000000.0],
+                "date": [target_date],
+                "coin_id": ["bitcoin"],
+                "rank": [1],
+            }
+        ).to_csv(daily_file_path, index=False)
+
+        rows = [
+            {
+                "timestamp": 1609459200000,
+                "price": price,
+                "volume": 1000.0,
+                "market_cap": market_cap,
+                "date": target_date,
+                "coin_id": coin_id,
+            }
+            for coin_id, price, market_cap in [
+                ("cardano", 1.5, 300000000.0),
+                ("ethereum", 730.0, 800000000.0),
+                ("bitcoin", 29000.0, 500000000.0),  # 已存在，应跳过
+            ]
+        ]
+
+        with patch(
+            "src.updaters.incremental_daily_updater.create_batch_downloader"
+        ), patch("src.updaters.incremental_daily_updater.CoinGeckoAPI"), patch(
+            "src.updaters.incremental_daily_updater.MarketDataFetcher"
+        ):
+
+            updater = IncrementalDailyUpdater(
+                coins_dir=str(self.coins_dir), daily_dir=str(self.daily_dir)
+            )
+
+            handled = updater.insert_coins_into_daily_file(target_date, rows)
+            self.assertEqual(handled, 3)
+
+            updated_df = pd.read_csv(daily_file_path)
+            self.assertEqual(
+                updated_df["coin_id"].tolist(), ["ethereum", "bitcoin", "cardano"]
+            )
+            self.assertEqual(updated_df["rank"].tolist(), [1, 2, 3])
+
+        print("✅ 批量插入测试通过")
+
+    def test_11_update_integrates_by_date(self):
+        """测试多个新币种按日期归并集成，每个每日文件只写一次"""
+        print("\n--- 测试 11: 按日期批量集成新币种 ---")
+
+        for coin_id, market_cap in [("cardano", 3e8), ("ethereum", 8e8)]:
+            pd.DataFrame(
+                {
+                    "timestamp": [1609459200000, 1609545600000],
+                    "price": [1.5, 1.6],
+                    "volume": [1000.0, None],
+                    "market_cap": [market_cap, market_cap],
+                }
+            ).to_csv(self.coins_dir / f"{coin_id}.csv", index=False)
+
+        month_dir = self.daily_dir / "2021" / "01"
+        month_dir.mkdir(parents=True)
+        for day in [1, 2]:
+            pd.DataFrame(
+                {
+                    "timestamp": [1609459200000 + (day - 1) * 86400000],
+                    "price": [29000.0],
+                    "volume": [1000000.0],
+                    "market_cap": [5e8],
+                    "date": [date(2021, 1, day)],
+                    "coin_id": ["bitcoin"],
+                    "rank": [1],
+                }
+            ).to_csv(month_dir / f"{date(2021, 1, day)}.csv", index=False)
+
+        with patch(
+            "src.updaters.incremental_daily_updater.create_batch_downloader"
+        ), patch("src.updaters.incremental_daily_updater.CoinGeckoAPI"), patch(
+            "src.updaters.incremental_daily_updater.MarketDataFetcher"
+        ):
+
+            updater = IncrementalDailyUpdater(
+                coins_dir=str(self.coins_dir), daily_dir=str(self.daily_dir)
+            )
+
+            # 与新币种无关的每日文件（故意未排序），不应被重排序
+            untouched_file = month_dir / "2021-01-05.csv"
+            pd.DataFrame(
+                {
+                    "coin_id": ["small", "big"],
+                    "market_cap": [1.0, 2.0],
+                    "rank": [1, 2],
+                }
+            ).to_csv(untouched_file, index=False)
+            untouched_content = untouched_file.read_text()
+
+            with patch.object(
+                updater, "detect_new_coins", return_value=["cardano", "ethereum"]
+            ), patch.object(updater, "download_new_coin_history", return_value=True):
+                results = updater.update_with_new_coins(top_n=10)
+
+            self.assertEqual(untouched_file.read_text(), untouched_content)
+
+            for coin_id in ["cardano", "ethereum"]:
+                self.assertEqual(
+                    results["integration_results"][coin_id]["inserted_days"], 2
+                )
+                self.assertEqual(
+                    results["integration_results"][coin_id]["inserted_dates"],
+                    ["2021-01-01", "2021-01-02"],
+                )
+
+            df = pd.read_csv(month_dir / "2021-01-02.csv")
+            self.assertEqual(df["coin_id"].tolist(), ["ethereum", "bitcoin", "cardano"])
+
+        print("✅ 按日期批量集成测试通过")
+
+    def test_12_backup_only_when_file_changes(self):
+        """测试已存在的币种不会触发备份，实际写入时才备份"""
+        print("\n--- 测试 12: 仅在写入时备份 ---")
+
+        target_date = date(2021, 1, 1)
+        month_dir = self.daily_dir / "2021" / "01"
+        month_dir.mkdir(parents=True)
+        pd.DataFrame(
+            {
+                "timestamp": [1609459200000],
+                "price": [29000.0],
+                "volume": [1000000.0],
+                "market_cap": [500000000.0],
+                "date": [target_date],
+                "coin_id": ["bitcoin"],
+                "rank": [1],
+            }
+        ).to_csv(month_dir / f"{target_date}.csv", index=False)
+
+        row = {
+            "timestamp": 1609459200000,
+            "price": 1.5,
+            "volume": 1000.0,
+            "market_cap": 300000000.0,
+            "date": target_date,
+            "coin_id": "bitcoin",
+        }
+
+        with patch(
+            "src.updaters.incremental_daily_updater.create_batch_downloader"
+        ), patch("src.updaters.incremental_daily_updater.CoinGeckoAPI"), patch(
+            "src.updaters.incremental_daily_updater.MarketDataFetcher"
+        ):
+
+            updater = IncrementalDailyUpdater(
+                coins_dir=str(self.coins_dir),
+                daily_dir=str(self.daily_dir),
+                backup_enabled=True,
+            )
+
+            # 币种已存在：不写入，也不备份
+            self.assertTrue(updater.insert_coin_into_daily_file(target_date, row))
+            self.assertFalse((month_dir / ".backup").exists())
+
+            # 新币种：写入前备份
+            row["coin_id"] = "cardano"
+            self.assertTrue(updater.insert_coin_into_daily_file(target_date, row))
+            backups = list((month_dir / ".backup").glob("*.csv"))
+            self.assertEqual(len(backups), 1)
+            # 备份是写入前的内容，新文件通过原子替换写入
+            self.assertEqual(pd.read_csv(backups[0])["coin_id"].tolist(), ["bitcoin"])
+            self.assertEqual(
+                sorted(pd.read_csv(month_dir / f"{target_date}.csv")["coin_id"]),
+                ["bitcoin", "cardano"],
+            )
+            self.assertFalse(list(month_dir.glob("*.tmp")))
+
+            # 同一批次共用时间戳后缀时，备份文件名追加序号而不是互相覆盖
+            for coin_id in ["ethereum", "solana"]:
+                row["coin_id"] = coin_id
+                updater.insert_coins_into_daily_file(
+                    target_date, [row], ts_suffix="20210101_000000"
+                )
+            self.assertEqual(
+                sorted(p.name for p in (month_dir / ".backup").glob("*_20210101_*")),
+                ["2021-01-01_20210101_000000.csv", "2021-01-01_20210101_000000_1.csv"],
+            )
+
+            # 每日聚合器会原地覆盖每日文件，备份内容不应随之改变
+            pd.DataFrame({"coin_id": ["overwritten"]}).to_csv(
+                month_dir / f"{target_date}.csv", index=False
+            )
+            self.assertEqual(pd.read_csv(backups[0])["coin_id"].tolist(), ["bitcoin"])
+
+        print("✅ 仅在写入时备份测试通过")
+
+    def test_13_existing_dates_scanned_once(self):
+        """测试已有每日文件日期只扫描一次，新一轮更新时重新扫描"""
+        print("\n--- 测试 13: 已有日期缓存 ---")
+
+        with patch(
+            "src.updaters.incremental_daily_updater.create_batch_downloader"
+        ), patch("src.updaters.incremental_daily_updater.CoinGeckoAPI"), patch(
+            "src.updaters.incremental_daily_updater.MarketDataFetcher"
+        ):
+
+            updater = IncrementalDailyUpdater(
+                coins_dir=str(self.coins_dir), daily_dir=str(self.daily_dir)
+            )
+
+            with patch.object(
+                updater,
+                "get_existing_daily_dates",
+                wraps=updater.get_existing_daily_dates,
+            ) as mock_scan, patch.object(updater, "detect_new_coins", return_value=[]):
+                for coin_id in ["bitcoin", "ethereum", "cardano"]:
+                    updater.integrate_new_coin_into_daily_files(coin_id)
+                self.assertEqual(mock_scan.call_count, 1)
+
+                # 写入新日期的文件后，日期直接加入缓存
+                row = {
+                    "timestamp": 1609459200000,
+                    "price": 1.0,
+                    "volume": 1.0,
+                    "market_cap": 1.0,
+                    "date": date(2021, 1, 1),
+                    "coin_id": "bitcoin",
+                }
+                self.assertTrue(
+                    updater.insert_coin_into_daily_file(date(2021, 1, 1), row)
+                )
+                self.assertIn(
+                    date(2021, 1, 1), updater._get_existing_daily_dates_cached()
+                )
+                self.assertEqual(mock_scan.call_count, 1)
+
+                # 新一轮更新会清空缓存
+                updater.update_with_new_coins()
+                self.assertIsNone(updater._existing_dates_cache)
+
+        print("✅ 已有日期缓存测试通过")
+
+    def test_14_insert_keeps_existing_rows_verbatim(self):
+        """测试插入时已有行按原文本写回，缺失市值排在最后"""
+        print("\n--- 测试 14: 插入保持原有行文本 ---")
+
+        target_date = date(2021, 1, 1)
+        month_dir = self.daily_dir / "2021" / "01"
+        month_dir.mkdir(parents=True)
+        daily_file_path = month_dir / f"{target_date}.csv"
+        daily_file_path.write_text(
+            "timestamp,price,volume,market_cap,date,coin_id,rank\n"
+            "1609459200000,29000.123456,1000000.0,500000000.000001,2021-01-01,bitcoin,1\n"
+            "1609459200000,1.0,10.0,,2021-01-01,unknown,2\n"
+        )
+
+        row = {
+            "timestamp": 1609459200000,
+            "price": 0.5,
+            "volume": float("nan"),
+            "market_cap": 600000000.0,
+            "date": target_date,
+            "coin_id": "cardano",
+        }
+
+        with patch(
+            "src.updaters.incremental_daily_updater.create_batch_downloader"
+        ), patch("src.updaters.incremental_daily_updater.CoinGeckoAPI"), patch(
+            "src.updaters.incremental_daily_updater.MarketDataFetcher"
+        ):
+
+            updater = IncrementalDailyUpdater(
+                coins_dir=str(self.coins_dir), daily_dir=str(self.daily_dir)
+            )
+            self.assertTrue(updater.insert_coin_into_daily_file(target_date, row))
+
+        self.assertEqual(
+            daily_file_path.read_text().splitlines(),
+            [
+                "timestamp,price,volume,market_cap,date,coin_id,rank",
+                "1609459200000,0.5,,600000000.0,2021-01-01,cardano,1",
+                "1609459200000,29000.123456,1000000.0,500000000.000001,2021-01-01,bitcoin,2",
+                "1609459200000,1.0,10.0,,2021-01-01,unknown,3",
+            ],
+        )
+
+        print("✅ 插入保持原有行文本测试通过")
+
+    def test_15_collect_rows_uses_latest_record_per_day(self):
+        """测试同日多条记录时取时间戳最新的一条，与文件中的顺序无关"""
+        print("\n--- 测试 15: 每日取最新记录 ---")
+
+        pd.DataFrame(
+            {
+                "timestamp": [1609502400000, 1609459200000, 1609545600000],
+                "price": [2.0, 1.0, 3.0],
+                "volume": [20.0, 10.0, 30.0],
+                "market_cap": [200.0, 100.0, 300.0],
+            }
+        ).to_csv(self.coins_dir / "cardano.csv", index=False)
+
+        with patch(
+            "src.updaters.incremental_daily_updater.create_batch_downloader"
+        ), patch("src.updaters.incremental_daily_updater.CoinGeckoAPI"), patch(
+            "src.updaters.incremental_daily_updater.MarketDataFetcher"
+        ):
+
+            updater = IncrementalDailyUpdater(
+                coins_dir=str(self.coins_dir), daily_dir=str(self.daily_dir)
+            )
+            coin_rows = updater._collect_coin_rows(
+                "cardano", {date(2021, 1, 1), date(2021, 1, 2)}
+            )
+
+        self.assertEqual(set(coin_rows), {date(2021, 1, 1), date(2021, 1, 2)})
+        self.assertEqual(coin_rows[date(2021, 1, 1)]["price"], 2.0)
+        self.assertEqual(coin_rows[date(2021, 1, 2)]["timestamp"], 1609545600000)
+
+        print("✅ 每日取最新记录测试通过")
+
+    def test_16_resort_all_daily_files(self):
+        """测试全量重排序会修正未排序的每日文件"""
+        print("\n--- 测试 16: 全量重排序 ---")
+
+        month_dir = self.daily_dir / "2021" / "01"
+        month_dir.mkdir(parents=True)
+        daily_file_path = month_dir / "2021-01-01.csv"
+        pd.DataFrame(
+            {
+                "timestamp": [1609459200000, 1609459200000],
+                "price": [1.0, 29000.0],
+                "volume": [10.0, 1000000.0],
+                "market_cap": [100.0, 500000000.0],
+                "date": ["2021-01-01", "2021-01-01"],
+                "coin_id": ["cardano", "bitcoin"],
+                "rank": [1, 2],
+            }
+        ).to_csv(daily_file_path, index=False)
+        # 与月份目录同名的文件不是每日数据文件，应保持不变
+        skipped_file_path = month_dir / "01.csv"
+        skipped_file_path.write_text("coin_id,market_cap\ncardano,1\nbitcoin,2\n")
+
+        with patch(
+            "src.updaters.incremental_daily_updater.create_batch_downloader"
+        ), patch("src.updaters.incremental_daily_updater.CoinGeckoAPI"), patch(
+            "src.updaters.incremental_daily_updater.MarketDataFetcher"
+        ):
+
+            updater = IncrementalDailyUpdater(
+                coins_dir=str(self.coins_dir), daily_dir=str(self.daily_dir)
+            )
+            results = {"summary": {}}
+            updater.resort_all_daily_files(results)
+
+        self.assertEqual(
+            skipped_file_path.read_text(), "coin_id,market_cap\ncardano,1\nbitcoin,2\n"
+        )
+
+        df = pd.read_csv(daily_file_path)
+        self.assertEqual(df["coin_id"].tolist(), ["bitcoin", "cardano"])
+        self.assertEqual(df["rank"].tolist(), [1, 2])
+        self.assertNotIn("resorting_errors", results["summary"])
+
+        print("✅ 全量重排序测试通过")
+
+    def test_17_market_coins_cache(self):
+        """测试市值排名缓存：有效期内不再请求接口，过期后重新获取"""
+        print("\n--- 测试 17: 市值排名缓存 ---")
+
+        with patch(
+            "src.updaters.incremental_daily_updater.create_batch_downloader"
+        ), patch("src.updaters.incremental_daily_updater.CoinGeckoAPI"), patch(
+            "src.updaters.incremental_daily_updater.MarketDataFetcher"
+        ) as MockMarketDataFetcher:
+
+            mock_fetcher = MockMarketDataFetcher.return_value
+            mock_fetcher.get_top_coins.return_value = [
+                {"id": "bitcoin"},
+                {"id": "cardano"},
+            ]
+
+            updater = IncrementalDailyUpdater(
+                coins_dir=str(self.coins_dir),
+                daily_dir=str(self.daily_dir),
+                market_cache_ttl=600,
+            )
+            # 缓存写在每日文件目录的上一级，而不是 logs/
+            self.assertEqual(updater.market_cache_dir, self.daily_dir.parent)
+
+            self.assertEqual(
+                updater.get_current_market_coins(10), {"bitcoin", "cardano"}
+            )
+            self.assertEqual(
+                updater.get_current_market_coins(10), {"bitcoin", "cardano"}
+            )
+            self.assertEqual(mock_fetcher.get_top_coins.call_count, 1)
+
+            # 不同的 top_n 使用各自的缓存文件
+            updater.get_current_market_coins(20)
+            self.assertEqual(mock_fetcher.get_top_coins.call_count, 2)
+
+            # 缓存过期后重新请求
+            updater.market_cache_ttl = 1
+            cache_path = self.daily_dir.parent / ".market_coins_top10.json"
+            os.utime(cache_path, (0, 0))
+            updater.get_current_market_coins(10)
+            self.assertEqual(mock_fetcher.get_top_coins.call_count, 3)
+
+        print("✅ 市值排名缓存测试通过")
+
 
 def run_tests():
     """运行所有测试"""
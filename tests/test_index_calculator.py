@@ -3,6 +3,7 @@
 """
 
 import unittest
+import numpy as np
 import pandas as pd
 import tempfile
 import shutil
@@ -12,11 +13,17 @@ import sys
 import os
 from unittest.mock import patch, MagicMock
 
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
 # 添加项目根目录到Python路径
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from src.index.market_cap_weighted import MarketCapWeightedIndexCalculator
 from src.downloaders.daily_aggregator import DailyDataAggregator
+from src.classification.unified_classifier import ClassificationResult
 
 
 class TestMarketCapWeightedIndexCalculatorModern(unittest.TestCase):
@@ -137,6 +144,146 @@ class TestMarketCapWeightedIndexCalculatorModern(unittest.TestCase):
         self.assertEqual(index_df.iloc[0]["date"], date(2024, 1, 1))
         self.assertEqual(index_df.iloc[1]["date"], date(2024, 1, 3))
 
+    def test_unreadable_day_is_skipped(self):
+        """测试某一天数据读取失败时只跳过该日"""
+
+        def failing_get_daily_data(target_date, force_refresh=False):
+            if target_date == date(2024, 1, 2):
+                raise OSError("文件损坏")
+            return self.mock_get_daily_data(target_date, force_refresh)
+
+        self.mock_get_daily_data_func.side_effect = failing_get_daily_data
+
+        index_df = self.calculator.calculate_index(
+            start_date="2024-01-01",
+            end_date="2024-01-03",
+            base_date="2024-01-01",
+            base_value=1000.0,
+            top_n=2,
+        )
+
+        self.assertEqual(list(index_df["date"]), [date(2024, 1, 1), date(2024, 1, 3)])
+
+    def test_no_data_in_range_raises(self):
+        """测试基准日有数据但计算区间内没有数据时应抛出ValueError"""
+        with self.assertRaisesRegex(ValueError, "无法生成指数数据"):
+            self.calculator.calculate_index(
+                start_date="2024-02-01",
+                end_date="2024-02-02",
+                base_date="2024-01-01",
+                base_value=1000.0,
+                top_n=2,
+            )
+
+    def test_index_values_keep_float64_precision(self):
+        """测试市值列保持 float64，指数值与逐项计算完全一致"""
+        daily_df = self.calculator._get_daily_data_cached(date(2024, 1, 2))
+        self.assertEqual(daily_df["market_cap"].dtype, "float64")
+
+        index_df = self.calculator.calculate_index(
+            start_date="2024-01-01",
+            end_date="2024-01-02",
+            base_date="2024-01-01",
+            top_n=2,
+        )
+        expected = 1000.0 * (8.2e11 + 3.12e11) / (8e11 + 3e11)
+        self.assertAlmostEqual(index_df.iloc[1]["index_value"], expected, places=9)
+        self.assertEqual(index_df["index_value"].dtype, "float64")
+
+    def test_get_prices_batch(self):
+        """测试批量获取价格，缺失币种返回 NaN"""
+        prices = self.calculator._get_prices_batch(
+            ["ethereum", "bitcoin", "unknown-coin"], date(2024, 1, 2)
+        )
+
+        self.assertEqual(list(prices.index), ["ethereum", "bitcoin", "unknown-coin"])
+        self.assertAlmostEqual(prices["ethereum"], 2600.0)
+        self.assertAlmostEqual(prices["bitcoin"], 41000.0)
+        self.assertTrue(pd.isna(prices["unknown-coin"]))
+
+        # 单个币种接口保持原有行为
+        self.assertAlmostEqual(
+            self.calculator._get_coin_price("solana", date(2024, 1, 2)), 105.0
+        )
+        self.assertIsNone(
+            self.calculator._get_coin_price("unknown-coin", date(2024, 1, 2))
+        )
+
+    def test_select_top_coins_with_weights(self):
+        """测试前N名选择与权重计算"""
+        market_caps = {"a": 10.0, "b": 50.0, "c": 30.0, "d": 10.0}
+
+        constituents, weights, total = self.calculator._select_top_coins_with_weights(
+            market_caps, 2
+        )
+        self.assertEqual(constituents, ["b", "c"])
+        self.assertAlmostEqual(total, 80.0)
+        self.assertAlmostEqual(weights[0], 50.0 / 80.0)
+        self.assertAlmostEqual(weights.sum(), 1.0)
+
+        # top_n 超过可用数量时返回全部，且与旧接口一致
+        self.assertEqual(
+            self.calculator._select_top_coins(market_caps, 10)[:2], ["b", "c"]
+        )
+        self.assertEqual(self.calculator._select_top_coins({}, 3), [])
+
+    def test_load_market_cap_panel(self):
+        """测试批量加载多日市值长表，无效市值和缺失日期被剔除"""
+        self.mock_daily_data["2024-01-02"].loc[2, "market_cap"] = 0
+        del self.mock_daily_data["2024-01-03"]
+
+        panel_df = self.calculator._load_market_cap_panel(
+            [date(2024, 1, 1), date(2024, 1, 2), date(2024, 1, 3)]
+        )
+
+        self.assertEqual(list(panel_df.columns), ["date", "coin_id", "market_cap"])
+        self.assertEqual(len(panel_df), 5)
+        self.assertEqual(
+            sorted(set(panel_df["date"])), [date(2024, 1, 1), date(2024, 1, 2)]
+        )
+        self.assertEqual(panel_df["market_cap"].dtype, np.float64)
+
+    def test_get_top_coins_cached(self):
+        """测试基准日前N名结果被缓存且不可修改，clear_cache 后重新计算"""
+        constituents, weights, total = self.calculator._get_top_coins_cached(
+            date(2024, 1, 1), 2
+        )
+        self.assertEqual(constituents, ("bitcoin", "ethereum"))
+        self.assertAlmostEqual(total / 1.1e12, 1.0, places=6)
+        self.assertFalse(weights.flags.writeable)
+
+        self.calculator._get_top_coins_cached(date(2024, 1, 1), 2)
+        self.assertEqual(self.mock_get_daily_data_func.call_count, 1)
+
+        self.calculator.clear_cache()
+        self.calculator._get_top_coins_cached(date(2024, 1, 1), 2)
+        self.assertEqual(self.mock_get_daily_data_func.call_count, 2)
+
+    def test_filter_coins_classifies_unique_ids_once(self):
+        """测试多日长表过滤时每个币种只分类一次，缺失的 coin_id 被剔除"""
+        calculator = MarketCapWeightedIndexCalculator()
+        panel_df = pd.DataFrame(
+            {
+                "coin_id": ["bitcoin", "tether", "bitcoin", "tether", None],
+                "market_cap": [8e11, 1e11, 8.2e11, 1e11, 1e9],
+            }
+        )
+        results = {
+            "bitcoin": ClassificationResult("bitcoin", confidence="high"),
+            "tether": ClassificationResult(
+                "tether", is_stablecoin=True, confidence="high"
+            ),
+        }
+        with patch.object(
+            calculator.classifier,
+            "classify_coin",
+            side_effect=lambda coin_id, use_cache=True: results[coin_id],
+        ) as mock_classify:
+            filtered_df = calculator._filter_coins(panel_df)
+
+        self.assertEqual(mock_classify.call_count, 2)
+        self.assertEqual(filtered_df["coin_id"].tolist(), ["bitcoin", "bitcoin"])
+
     def test_force_rebuild_flag(self):
         """测试 force_rebuild 标志是否正确传递以及缓存是否生效"""
         calculator = MarketCapWeightedIndexCalculator(
@@ -162,5 +309,62 @@ class TestMarketCapWeightedIndexCalculatorModern(unittest.TestCase):
             mock_get.assert_called_once()
 
 
+@unittest.skipIf(pa is None, "未安装 pyarrow")
+class TestParquetPanelCache(unittest.TestCase):
+    """测试 Parquet 面板缓存"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        daily_files_dir = Path(self.temp_dir) / "daily_files" / "2024" / "01"
+        daily_files_dir.mkdir(parents=True)
+
+        for day, caps in [
+            ("2024-01-01", [8e11, 3e11, 5e10]),
+            ("2024-01-02", [8.2e11, 3.12e11, 5.25e10]),
+        ]:
+            pd.DataFrame(
+                {
+                    "timestamp": [1704067200000] * 3,
+                    "price": [40000.0, 2500.0, 100.0],
+                    "volume": [1e6, 5e5, 2e5],
+                    "market_cap": caps,
+                    "date": [day] * 3,
+                    "coin_id": ["bitcoin", "ethereum", "solana"],
+                    "rank": [1, 2, 3],
+                }
+            ).to_csv(daily_files_dir / f"{day}.csv", index=False)
+
+        self.calculator = MarketCapWeightedIndexCalculator(
+            daily_output_dir=self.temp_dir,
+            exclude_stablecoins=False,
+            exclude_wrapped_coins=False,
+            use_parquet_cache=True,
+        )
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_calculate_index_from_parquet_cache(self):
+        """测试指数计算从 Parquet 缓存加载，不再逐日读取CSV"""
+        with patch.object(
+            self.calculator.daily_aggregator, "get_daily_data"
+        ) as mock_get:
+            index_df = self.calculator.calculate_index(
+                start_date="2024-01-01", end_date="2024-01-02", top_n=2
+            )
+            mock_get.assert_not_called()
+
+        self.assertTrue((Path(self.temp_dir) / "_panel" / "_built").exists())
+        expected = 1000.0 * (8.2e11 + 3.12e11) / (8e11 + 3e11)
+        self.assertAlmostEqual(index_df.iloc[1]["index_value"], expected, places=3)
+
+    def test_load_range_filters_dates(self):
+        """测试按日期范围加载缓存"""
+        panel_df = self.calculator._load_range(date(2024, 1, 2), date(2024, 1, 2))
+
+        self.assertEqual(len(panel_df), 3)
+        self.assertEqual(set(panel_df["date"]), {date(2024, 1, 2)})
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -4,6 +4,7 @@
 
 import os
 import sys
+import tempfile
 import unittest
 from datetime import datetime, timedelta
 from pathlib import Path
@@ -123,6 +124,67 @@ class TestPriceDataUpdaterLogic(unittest.TestCase):
 
         print("✅ update_with_smart_strategy() 工作流测试成功")
 
+    @patch("src.updaters.price_updater.CoinGeckoAPI")
+    @patch("src.updaters.price_updater.create_batch_downloader")
+    @patch("src.updaters.price_updater.MarketDataFetcher")
+    def test_concurrent_update_matches_sequential_prefix(
+        self, MockMarketDataFetcher, mock_create_batch_downloader, MockCoinGeckoAPI
+    ):
+        """测试并发下载只处理逐个下载时会处理到的币种"""
+        updater = PriceDataUpdater()
+        updater.classifier = MagicMock()
+        updater.classifier.classify_coin.side_effect = lambda coin_id: MagicMock(
+            is_stablecoin=coin_id == "tether", is_wrapped_coin=False
+        )
+        # ethereum 下载失败，需要向后补位
+        updater.download_coin_data = MagicMock(
+            side_effect=lambda coin_id: (coin_id != "ethereum", True)
+        )
+
+        coins = [
+            {"id": coin_id, "symbol": coin_id[:3]}
+            for coin_id in ["bitcoin", "ethereum", "tether", "solana", "ripple"]
+        ]
+        native_updated = updater._process_coins_in_order(
+            coins, 2, 0, set(), MagicMock(), max_workers=4
+        )
+
+        self.assertEqual(native_updated, 2)
+        downloaded = {c.args[0] for c in updater.download_coin_data.call_args_list}
+        self.assertEqual(downloaded, {"bitcoin", "ethereum", "tether", "solana"})
+        self.assertEqual(updater.stats["native_updated"], 2)
+        self.assertEqual(updater.stats["stable_updated"], 1)
+        self.assertEqual(updater.stats["failed_updates"], 1)
+        self.assertEqual(updater.stats["api_calls"], 4)
+        self.assertEqual(updater.stats["total_processed"], 4)
+        # 连接池按并发数扩容，避免线程间争抢连接
+        updater.downloader.api.set_pool_size.assert_called_once_with(4)
+
+    @patch("src.updaters.price_updater.CoinGeckoAPI")
+    @patch("src.updaters.price_updater.create_batch_downloader")
+    @patch("src.updaters.price_updater.MarketDataFetcher")
+    def test_downloader_shares_rate_limiter(
+        self, MockMarketDataFetcher, mock_create_batch_downloader, MockCoinGeckoAPI
+    ):
+        """测试下载器使用更新器的令牌桶，跳过的币种不发起下载"""
+        mock_downloader = mock_create_batch_downloader.return_value
+        mock_downloader.download_coin_data.return_value = True
+        updater = PriceDataUpdater()
+
+        # 令牌在下载器内每次 HTTP 请求前获取，重试也受限流约束
+        self.assertIs(mock_downloader.rate_limiter, updater.rate_limiter)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            updater.coins_dir = Path(tmp)
+            self.assertEqual(updater.download_coin_data("bitcoin"), (True, True))
+            mock_downloader.download_coin_data.assert_called_once()
+
+            # 数据质量良好时跳过下载，不发起API请求
+            (Path(tmp) / "bitcoin.csv").write_text("timestamp\n")
+            updater._check_data_quality = MagicMock(return_value=True)
+            self.assertEqual(updater.download_coin_data("bitcoin"), (True, False))
+            mock_downloader.download_coin_data.assert_called_once()
+
 
 class TestUpdateMetadataScript(unittest.TestCase):
     """测试 scripts/update_all_metadata.py 脚本"""
@@ -169,18 +231,13 @@ class TestMetadataUpdaterIntegration(unittest.TestCase):
         """测试从数据目录获取所有币种 ID"""
         print("\n--- 测试 get_all_coin_ids_from_data ---")
 
-        with patch("pathlib.Path.exists", return_value=True), patch(
-            "pathlib.Path.glob"
-        ) as mock_glob:
-            # 模拟 CSV 文件
-            mock_file1 = MagicMock()
-            mock_file1.stem = "bitcoin"
-            mock_file2 = MagicMock()
-            mock_file2.stem = "ethereum"
-            mock_file3 = MagicMock()
-            mock_file3.stem = "cardano"
-
-            mock_glob.return_value = [mock_file1, mock_file2, mock_file3]
+        with tempfile.TemporaryDirectory() as temp_dir:
+            coins_dir = Path(temp_dir)
+            # 模拟 CSV 文件，以及应被忽略的其他文件和子目录
+            for name in ["bitcoin.csv", "ethereum.csv", "cardano.csv", "notes.txt"]:
+                (coins_dir / name).write_text("")
+            (coins_dir / "backup.csv").mkdir()
+            self.updater.coins_dir = coins_dir
 
             # 执行函数
             result = self.updater.get_all_coin_ids_from_data()
@@ -194,16 +251,13 @@ class TestMetadataUpdaterIntegration(unittest.TestCase):
         """测试获取已有元数据的币种 ID"""
         print("\n--- 测试 get_existing_metadata_coin_ids ---")
 
-        with patch("pathlib.Path.exists", return_value=True), patch(
-            "pathlib.Path.glob"
-        ) as mock_glob:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            metadata_coin_dir = Path(temp_dir) / "coin_metadata"
+            metadata_coin_dir.mkdir()
             # 模拟 JSON 文件
-            mock_file1 = MagicMock()
-            mock_file1.stem = "bitcoin"
-            mock_file2 = MagicMock()
-            mock_file2.stem = "ethereum"
-
-            mock_glob.return_value = [mock_file1, mock_file2]
+            for name in ["bitcoin.json", "ethereum.json", "readme.md"]:
+                (metadata_coin_dir / name).write_text("{}")
+            self.updater.metadata_dir = Path(temp_dir)
 
             # 执行函数
             result = self.updater.get_existing_metadata_coin_ids()
@@ -242,7 +296,7 @@ class TestMetadataUpdaterIntegration(unittest.TestCase):
 
         # 执行函数
         result = self.updater.batch_update_all_metadata(
-            batch_size=2, delay_seconds=0.1, force_update=False
+            batch_size=2, delay_seconds=0.1, force_update=False, max_workers=1
         )
 
         # 验证调用
@@ -256,6 +310,195 @@ class TestMetadataUpdaterIntegration(unittest.TestCase):
 
         print("✅ batch_update_all_metadata (增量模式) 测试成功")
 
+    @patch("time.sleep")
+    def test_batch_update_all_metadata_concurrent(self, mock_sleep):
+        """测试并发更新模式（与串行模式一致，失败不重试）"""
+        print("\n--- 测试 batch_update_all_metadata (并发模式) ---")
+
+        coin_ids = ["bitcoin", "cardano", "ethereum", "solana", "tron"]
+        self.updater.get_all_coin_ids_from_data = MagicMock(return_value=coin_ids)
+        self.updater.get_existing_metadata_coin_ids = MagicMock(return_value=set())
+
+        # tron 失败，每个币种只尝试一次
+        attempts = {}
+
+        def fake_update(coin_id, force=False):
+            attempts[coin_id] = attempts.get(coin_id, 0) + 1
+            return coin_id != "tron"
+
+        mock_downloader = MagicMock()
+        mock_downloader.update_coin_metadata.side_effect = fake_update
+        self.updater.downloader = mock_downloader
+
+        result = self.updater.batch_update_all_metadata(
+            batch_size=2, delay_seconds=0.1, force_update=False, max_workers=4
+        )
+
+        # 结果顺序与输入一致，且不再走串行批量接口
+        self.assertEqual(list(result), coin_ids)
+        self.assertEqual(
+            result,
+            {
+                "bitcoin": True,
+                "cardano": True,
+                "ethereum": True,
+                "solana": True,
+                "tron": False,
+            },
+        )
+        mock_downloader.batch_update_coin_metadata.assert_not_called()
+        self.assertEqual(attempts, {coin_id: 1 for coin_id in coin_ids})
+
+        print("✅ batch_update_all_metadata (并发模式) 测试成功")
+
+    @patch("src.updaters.metadata_updater.TokenBucket")
+    def test_batch_update_all_metadata_token_bucket(self, MockTokenBucket):
+        """测试并发模式按 requests_per_minute 创建共享令牌桶"""
+        print("\n--- 测试 batch_update_all_metadata (令牌桶限速) ---")
+
+        coin_ids = ["bitcoin", "cardano", "ethereum"]
+        self.updater.get_all_coin_ids_from_data = MagicMock(return_value=coin_ids)
+        self.updater.get_existing_metadata_coin_ids = MagicMock(return_value=set())
+        self.updater.requests_per_minute = 600
+
+        mock_downloader = MagicMock()
+        mock_downloader.rate_limiter = None
+        limiters = []
+
+        def fake_update(coin_id, force=False):
+            limiters.append(mock_downloader.rate_limiter)
+            return True
+
+        mock_downloader.update_coin_metadata.side_effect = fake_update
+        self.updater.downloader = mock_downloader
+
+        result = self.updater.batch_update_all_metadata(
+            batch_size=2, delay_seconds=0.5, force_update=True, max_workers=4
+        )
+
+        self.assertTrue(all(result.values()))
+        # 速率由 requests_per_minute 决定，整个任务只创建一个令牌桶
+        MockTokenBucket.assert_called_once_with(10.0, capacity=4)
+        # 令牌桶交给下载器在实际请求前获取，任务结束后恢复原设置
+        self.assertEqual(limiters, [MockTokenBucket.return_value] * 3)
+        self.assertIsNone(mock_downloader.rate_limiter)
+
+        print("✅ batch_update_all_metadata (令牌桶限速) 测试成功")
+
+    def test_adapt_batch_policy(self):
+        """测试自适应批次策略（AIMD）"""
+        print("\n--- 测试 _adapt_batch_policy ---")
+
+        from collections import deque
+
+        from src.updaters.metadata_updater import MetadataUpdater
+
+        policy = MetadataUpdater._adapt_batch_policy
+
+        # 窗口未满时保持不变
+        rates = deque([1.0, 1.0], maxlen=3)
+        self.assertEqual(policy(40, 1.0, rates), (40, 1.0))
+
+        # 连续 3 批高成功率：批次放大，请求间隔倍数逐步恢复
+        rates.append(1.0)
+        self.assertEqual(policy(40, 4.0, rates), (50, 2.0))
+        self.assertEqual(policy(250, 1.0, rates), (256, 1.0))
+        self.assertEqual(policy(300, 1.0, rates), (300, 1.0))
+
+        # 最新一批成功率过低：批次减半、请求间隔加倍，并清空窗口
+        rates.append(0.5)
+        self.assertEqual(policy(50, 1.0, rates), (25, 2.0))
+        self.assertEqual(len(rates), 0)
+
+        print("✅ _adapt_batch_policy 测试成功")
+
+    @patch("time.sleep")
+    def test_batch_update_all_metadata_adaptive(self, mock_sleep):
+        """测试自适应模式下每个币种只处理一次"""
+        print("\n--- 测试 batch_update_all_metadata (自适应模式) ---")
+
+        coin_ids = [f"coin-{i:02d}" for i in range(30)]
+        self.updater.get_all_coin_ids_from_data = MagicMock(return_value=coin_ids)
+        self.updater.get_existing_metadata_coin_ids = MagicMock(return_value=set())
+
+        # 前 4 个币种始终失败，触发批次减半
+        batch_sizes = []
+
+        def fake_batch_update(coin_ids, force=False, delay_seconds=0.2):
+            batch_sizes.append(len(coin_ids))
+            return {coin_id: coin_id >= "coin-04" for coin_id in coin_ids}
+
+        mock_downloader = MagicMock()
+        mock_downloader.batch_update_coin_metadata.side_effect = fake_batch_update
+        self.updater.downloader = mock_downloader
+
+        result = self.updater.batch_update_all_metadata(
+            batch_size=8, delay_seconds=0.1, max_workers=1, adaptive=True
+        )
+
+        self.assertEqual(list(result), coin_ids)
+        self.assertEqual(sum(result.values()), 26)
+        # 第一批成功率 50% 后批次减半，随后连续成功再逐步放大
+        self.assertEqual(batch_sizes[:2], [8, 4])
+        self.assertEqual(sum(batch_sizes), len(coin_ids))
+        self.assertGreater(max(batch_sizes[2:]), 4)
+
+        print("✅ batch_update_all_metadata (自适应模式) 测试成功")
+
+    def test_generate_complete_native_coin_list(self):
+        """测试原生币列表直接复用分类结果，不再重复读取元数据"""
+        print("\n--- 测试 generate_complete_native_coin_list ---")
+
+        from src.classification.unified_classifier import ClassificationResult
+
+        coin_ids = ["bitcoin", "no-metadata", "tether", "wrapped-bitcoin"]
+        self.updater.get_all_coin_ids_from_data = MagicMock(return_value=coin_ids)
+        self.updater.classifier.classify_coins_batch.return_value = {
+            "bitcoin": ClassificationResult(
+                coin_id="bitcoin",
+                name="Bitcoin",
+                symbol="btc",
+                confidence="high",
+                all_categories=["Layer 1 (L1)", "Proof of Work (PoW)"],
+                last_updated="2025-01-01T00:00:00+00:00",
+            ),
+            "no-metadata": ClassificationResult(coin_id="no-metadata"),
+            "tether": ClassificationResult(
+                coin_id="tether", is_stablecoin=True, confidence="high"
+            ),
+            "wrapped-bitcoin": ClassificationResult(
+                coin_id="wrapped-bitcoin", is_wrapped_coin=True, confidence="high"
+            ),
+        }
+
+        self.updater.classifier.metadata_digest.return_value = "digest-1"
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            self.updater.metadata_dir = Path(temp_dir)
+
+            self.assertTrue(self.updater.generate_complete_native_coin_list())
+
+            df = pd.read_csv(Path(temp_dir) / "native_coins.csv")
+
+            # 摘要未变化时直接跳过，不再重新分类
+            self.assertTrue(self.updater.generate_complete_native_coin_list())
+            self.assertEqual(self.updater.classifier.classify_coins_batch.call_count, 1)
+
+            # 元数据变化（摘要不同）后重新生成
+            self.updater.classifier.metadata_digest.return_value = "digest-2"
+            self.assertTrue(self.updater.generate_complete_native_coin_list())
+            self.assertEqual(self.updater.classifier.classify_coins_batch.call_count, 2)
+            self.assertEqual(
+                (Path(temp_dir) / ".native_coins.digest").read_text(), "digest-2"
+            )
+
+        # 只有有元数据的原生币被导出，且无需再次加载元数据文件
+        self.assertEqual(df["coin_id"].tolist(), ["bitcoin"])
+        self.assertEqual(df.loc[0, "categories"], "Layer 1 (L1);Proof of Work (PoW)")
+        self.updater.downloader._load_coin_metadata.assert_not_called()
+
+        print("✅ generate_complete_native_coin_list 测试成功")
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -4,6 +4,7 @@
 
 import os
 import sys
+import tempfile
 import unittest
 from pathlib import Path
 from unittest.mock import MagicMock, Mock, patch
@@ -115,14 +116,11 @@ class TestMetadataUpdater(unittest.TestCase):
         """测试从数据目录获取币种ID"""
         print("\n--- 测试从数据目录获取币种ID ---")
 
-        with patch("pathlib.Path.exists", return_value=True), patch(
-            "pathlib.Path.glob",
-            return_value=[
-                Path("data/coins/bitcoin.csv"),
-                Path("data/coins/ethereum.csv"),
-                Path("data/coins/tether.csv"),
-            ],
-        ):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            for coin_id in ["bitcoin", "ethereum", "tether"]:
+                Path(temp_dir, f"{coin_id}.csv").write_text("")
+            self.updater.coins_dir = Path(temp_dir)
+
             coin_ids = self.updater.get_all_coin_ids_from_data()
 
             self.assertEqual(len(coin_ids), 3)
@@ -135,13 +133,13 @@ class TestMetadataUpdater(unittest.TestCase):
         """测试获取已有元数据的币种ID"""
         print("\n--- 测试获取已有元数据币种ID ---")
 
-        with patch("pathlib.Path.exists", return_value=True), patch(
-            "pathlib.Path.glob",
-            return_value=[
-                Path("data/metadata/coin_metadata/bitcoin.json"),
-                Path("data/metadata/coin_metadata/ethereum.json"),
-            ],
-        ):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            metadata_coin_dir = Path(temp_dir, "coin_metadata")
+            metadata_coin_dir.mkdir()
+            for coin_id in ["bitcoin", "ethereum"]:
+                (metadata_coin_dir / f"{coin_id}.json").write_text("{}")
+            self.updater.metadata_dir = Path(temp_dir)
+
             existing_ids = self.updater.get_existing_metadata_coin_ids()
 
             self.assertEqual(len(existing_ids), 2)